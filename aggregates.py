@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from cube import DOSE_COLUMNS, load_cube
+from data_loader import cached_derived, read_dataset
+
+
+# Attributes that are constant within a region, taken from its first non-null row
+REGION_ATTRIBUTES = ['pop_resid', 'gdp_tot']
+
+# Measures summed per region
+REGION_MEASURES = ['dailytotal', 'males', 'females'] + DOSE_COLUMNS
+
+
+def build_region_summary(data, cube):
+    """
+    Build one row per region with the summed measures and the regional attributes.
+
+    Parameters:
+    - data: pandas DataFrame, row-level dataset, only 'region_name' and the
+      REGION_ATTRIBUTES columns are used
+    - cube: AggregateCube built from the same dataset
+
+    Returns:
+    - region_summary: pandas DataFrame indexed by position with a 'region_name' column
+    """
+    region_summary = cube.sum(by=['region_name'], measures=REGION_MEASURES)
+
+    attributes = [name for name in REGION_ATTRIBUTES if name in data.columns]
+    if attributes:
+        region_attributes = data.groupby('region_name', observed=True)[attributes].first().reset_index()
+        region_attributes['region_name'] = region_attributes['region_name'].astype(str)
+        region_summary = region_summary.merge(region_attributes, on='region_name', how='left')
+
+    return region_summary
+
+
+def select_region_summary(region_summary, cube):
+    """
+    Sum the measures of the region summary again over a cube cut by AggregateCube.select.
+
+    Parameters:
+    - region_summary: pandas DataFrame, summary of the whole dataset, gives the regional attributes
+    - cube: AggregateCube, the cut cube
+
+    Returns:
+    - region_summary: pandas DataFrame, one row per region left in the cube
+    """
+    attributes = [name for name in REGION_ATTRIBUTES if name in region_summary.columns]
+    selected = cube.sum(by=['region_name'], measures=REGION_MEASURES)
+    return selected.merge(region_summary[['region_name'] + attributes], on='region_name', how='left')
+
+
+def load_region_summary(path=None, columns=None):
+    """
+    Compute the region summary once per dataset version and share it across sessions.
+
+    The regional attributes are read on their own, so the cube can be shared
+    with the pages that do not use them, and only the summary is kept. The
+    returned DataFrame is shared, callers must copy it before modifying it.
+
+    Parameters:
+    - path: str, path to the CSV file or the Parquet store
+    - columns: list of str, columns passed to load_cube
+
+    Returns:
+    - region_summary: pandas DataFrame
+    """
+    def build(path):
+        attributes = read_dataset(path, ['region_name'] + REGION_ATTRIBUTES)
+        return build_region_summary(attributes, load_cube(path, columns))
+
+    name = ('region_summary', tuple(columns) if columns is not None else None)
+    return cached_derived(name, path, build)
+
+
+def daily_series(cube, by=None, measures=('dailytotal',)):
+    """
+    Collapse the rows to one point per date, or per date and `by`, before plotting.
+
+    Parameters:
+    - cube: AggregateCube
+    - by: str, optional dimension giving one line per label (e.g. 'supplier')
+    - measures: list of str, measures to sum
+
+    Returns:
+    - series: pandas DataFrame sorted by date with 'administration_date',
+      the `by` column and the measures
+    """
+    keep = ['administration_date'] + ([by] if by else [])
+    series = cube.sum(by=keep, measures=list(measures))
+    return series.sort_values(keep, kind='stable').reset_index(drop=True)
+
+
+def split_series(cube, by=('region_name',)):
+    """
+    Split the daily dailytotal series by one or more dimensions.
+
+    Parameters:
+    - cube: AggregateCube
+    - by: list of str, dimensions to split on (e.g. ['region_name', 'supplier'])
+
+    Returns:
+    - series: dict mapping a tuple of labels to a daily pandas Series
+    """
+    by = list(by)
+    totals = cube.sum(by=['administration_date'] + by, measures=['dailytotal'])
+    dates = pd.DatetimeIndex(cube.labels['administration_date'])
+    full_range = pd.date_range(dates.min(), dates.max(), freq='D')
+
+    series = {}
+    for key, rows in totals.groupby(by, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        values = rows.set_index('administration_date')['dailytotal']
+        series[key] = values.reindex(full_range, fill_value=0).astype(np.float64)
+    return series
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import shutil
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cube import DOSE_COLUMNS
+from data_loader import read_dataset
+from ingest import UPSTREAM_PATH, merge_regional_attributes
+from parallel import available_cores
+from regions import REGIONS_PATH
+
+
+# Signatures of the inputs each output was last built from
+STATE_FILE = '_build_state.json'
+
+# An output of the notebook: the files it is built from and the function building it.
+# build receives the upstream rows followed by the paths of the other inputs,
+# an output without build function is a copy of its only input.
+Target = namedtuple('Target', ['output', 'inputs', 'build', 'index'])
+
+
+def region_over_time(data):
+    return data.groupby(['administration_date', 'region_name'], observed=True)[['males', 'females']].sum().sort_values(by='males', ascending=False)
+
+
+def region_all_time(data):
+    return data.groupby('region_name', observed=True)[['males', 'females']].sum().sort_values(by='males', ascending=False)
+
+
+def doses_over_time(data):
+    return data.groupby('administration_date')[DOSE_COLUMNS].sum()
+
+
+def daily_gender(data):
+    daily = data.groupby('administration_date')[['males', 'females']].sum()
+    daily['Total'] = daily['males'] + daily['females']
+    return daily
+
+
+def supplier_total(data):
+    # Every numeric column of the notebook's frame, dailytotal included, and the total per supplier
+    supplier_tot = data.assign(dailytotal=data['males'] + data['females']).groupby('supplier', observed=True).sum(numeric_only=True)
+    supplier_tot['total'] = supplier_tot['males'] + supplier_tot['females']
+    return supplier_tot
+
+
+def regions_doses_total(data):
+    data = data.assign(dailytotal=data['males'] + data['females'])
+    return data.groupby('region_name', observed=True)[['dailytotal'] + DOSE_COLUMNS + ['males', 'females']].sum()
+
+
+def merged_pop_gdp(data, regions_path):
+    merged_data, unmatched = merge_regional_attributes(data, regions_path)
+    if len(unmatched):
+        print(f"Region code/name pairs without attributes:\n{unmatched.to_string(index=False)}")
+    return merged_data
+
+
+TARGETS = [
+    Target('RegionOverTimeMaleFemale.csv', [UPSTREAM_PATH], region_over_time, True),
+    Target('RegionAllTimeMaleFemale.csv', [UPSTREAM_PATH], region_all_time, True),
+    Target('DosesOverTime_df.csv', [UPSTREAM_PATH], doses_over_time, True),
+    Target('daily_genderTotal.csv', [UPSTREAM_PATH], daily_gender, True),
+    # Same content as daily_genderTotal.csv
+    Target('dailyTotalMaleFemale.csv', ['daily_genderTotal.csv'], None, True),
+    Target('supplier_total.csv', [UPSTREAM_PATH], supplier_total, True),
+    Target('RegionsDosesTotal.csv', [UPSTREAM_PATH], regions_doses_total, True),
+    Target('italian_vaccination_mergedPopGDP.csv', [UPSTREAM_PATH, REGIONS_PATH], merged_pop_gdp, False),
+]
+
+
+def file_signature(path):
+    """
+    Return (size, modification time in ns) of a file, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(path, state):
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=1)
+
+
+def target_signature(target):
+    """
+    Return the signature of everything an output depends on: its inputs and the function building it.
+    """
+    return {'inputs': {path: file_signature(path) for path in target.inputs},
+            'build': target.build.__name__ if target.build is not None else 'copy'}
+
+
+def is_stale(target, state):
+    """
+    Tell whether an output is missing, was modified, or was built from different inputs.
+    """
+    entry = state.get(target.output)
+    return (entry is None
+            or entry['output'] != file_signature(target.output)
+            or entry['signature'] != target_signature(target))
+
+
+def write_output(frame, path, index):
+    """
+    Write a built frame as CSV, or as Parquet if the path ends with .parquet.
+    """
+    if path.endswith('.parquet'):
+        frame.to_parquet(path, index=index)
+    else:
+        frame.to_csv(path, index=index)
+
+
+def _build_one(target, load):
+    if target.build is None:
+        shutil.copyfile(target.inputs[0], target.output)
+    else:
+        write_output(target.build(load(), *target.inputs[1:]), target.output, target.index)
+
+
+def build(targets=TARGETS, upstream_path=UPSTREAM_PATH, state_path=STATE_FILE, workers=None, force=False):
+    """
+    Rebuild the stale outputs, running the independent ones in parallel.
+
+    The upstream file is parsed at most once and the parsed rows are shared by
+    every output, so the workers are threads. An output depending on another
+    output starts once that one is up to date.
+
+    Parameters:
+    - targets: list of Target
+    - upstream_path: str, path to italian_vaccination.csv
+    - state_path: str, JSON file with the signatures of the last build
+    - workers: int, number of outputs built at the same time (all available cores if None)
+    - force: bool, rebuild every output
+
+    Returns:
+    - built: list of str, the outputs that were rebuilt
+    """
+    state = {} if force else _load_state(state_path)
+    outputs = {target.output for target in targets}
+    pending = {target.output: target for target in targets}
+    done, built = set(), []
+
+    data = []
+
+    def load():
+        # Parsed once, on the first stale output needing it
+        if not data:
+            data.append(read_dataset(upstream_path))
+        return data[0]
+
+    # The first call happens before the workers start, so only one thread parses the file
+    if any(is_stale(target, state) and upstream_path in target.inputs for target in targets):
+        load()
+
+    # The state is saved even if an output fails, so the finished ones are not rebuilt
+    try:
+        with ThreadPoolExecutor(max_workers=workers or available_cores()) as pool:
+            running = {}
+            while pending or running:
+                # Start every output whose upstream outputs are up to date
+                for output, target in list(pending.items()):
+                    if all(path in done or path not in outputs for path in target.inputs):
+                        del pending[output]
+                        if is_stale(target, state):
+                            running[pool.submit(_build_one, target, load)] = target
+                        else:
+                            done.add(output)
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"Circular dependencies between {sorted(pending)}")
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    target = running.pop(future)
+                    future.result()
+                    state[target.output] = {'signature': target_signature(target), 'output': file_signature(target.output)}
+                    done.add(target.output)
+                    built.append(target.output)
+    finally:
+        _save_state(state_path, state)
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the CSV files derived from italian_vaccination.csv that are out of date.')
+    parser.add_argument('--upstream', default=UPSTREAM_PATH)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='rebuild every output')
+    args = parser.parse_args()
+
+    targets = TARGETS
+    if args.format == 'parquet':
+        rename = {target.output: target.output[:-len('.csv')] + '.parquet' for target in TARGETS}
+        targets = [target._replace(output=rename[target.output],
+                                   inputs=[rename.get(path, path) for path in target.inputs])
+                   for target in TARGETS]
+    targets = [target._replace(inputs=[args.upstream if path == UPSTREAM_PATH else path for path in target.inputs])
+               for target in targets]
+
+    built = build(targets, upstream_path=args.upstream, workers=args.workers, force=args.force)
+    for target in targets:
+        print(f"{'built' if target.output in built else 'up to date'}: {target.output}")
+
+
+if __name__ == '__main__':
+    main()
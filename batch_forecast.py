@@ -0,0 +1,141 @@
+import argparse
+import signal
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+from aggregates import split_series
+from cube import load_cube
+from parallel import process_pool
+
+
+# Same model as the national SARIMA cell of the notebook
+ORDER = (1, 1, 1)
+SEASONAL_ORDER = (0, 1, 1, 7)
+
+# Share of each series held out to compute the RMSE
+TEST_FRACTION = 0.2
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def fit_series(key, series, steps, order=ORDER, seasonal_order=SEASONAL_ORDER, timeout=None):
+    """
+    Fit SARIMAX on one series like the notebook, report its test RMSE and forecast `steps` days.
+
+    The model is fitted on the first differences of the training part, scored
+    on the held-out part, then updated with the held-out observations (without
+    refitting) to forecast past the end of the series.
+
+    Parameters:
+    - key: tuple, labels identifying the series
+    - series: pandas Series, daily values
+    - steps: int, number of days to forecast
+    - order: tuple, ARIMA order
+    - seasonal_order: tuple, seasonal order
+    - timeout: int, seconds after which the fit is abandoned (None for no limit)
+
+    Returns:
+    - result: dict with key, status, rmse, seconds and the forecast Series
+    """
+    start = time.perf_counter()
+    result = {'key': key, 'status': 'ok', 'rmse': np.nan, 'forecast': None}
+
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(int(timeout))
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            warnings.simplefilter('ignore', UserWarning)
+
+            target_diff = series.diff().dropna()
+            train_size = int(len(target_diff) * (1 - TEST_FRACTION))
+            train, test = target_diff[:train_size], target_diff[train_size:]
+
+            sarima_fit = SARIMAX(train, order=order, seasonal_order=seasonal_order).fit(disp=False)
+
+            # Invert differencing to score the held-out part in the original scale
+            predicted = series.iloc[train_size] + sarima_fit.get_forecast(steps=len(test)).predicted_mean.cumsum()
+            actual = series.iloc[train_size + 1:train_size + 1 + len(test)]
+            result['rmse'] = float(np.sqrt(np.mean((actual.to_numpy() - predicted.to_numpy()) ** 2)))
+
+            # Forecast past the end of the series
+            full_fit = sarima_fit.append(test, refit=False)
+            forecast = series.iloc[-1] + full_fit.get_forecast(steps=steps).predicted_mean.cumsum()
+            forecast.index = pd.date_range(series.index[-1], periods=steps + 1, freq='D')[1:]
+            result['forecast'] = np.maximum(forecast, 0)
+    except _Timeout:
+        result['status'] = 'timeout'
+    except Exception as error:
+        result['status'] = f'error: {error}'
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def forecast_batch(series, key_names=('region_name',), steps=30, workers=None, timeout=None, blas_threads=1, **model_kwargs):
+    """
+    Fit one model per series in a process pool and collect the results in one table.
+
+    Parameters:
+    - series: dict from split_series
+    - key_names: list of str, the dimensions the series were split on
+    - steps: int, number of days to forecast
+    - workers: int, number of processes (all available cores if None)
+    - timeout: int, per-series timeout in seconds
+    - blas_threads: int, threads allowed to the BLAS libraries in each worker
+    - model_kwargs: order / seasonal_order passed to fit_series
+
+    Returns:
+    - results: pandas DataFrame with one row per series and forecast date:
+      the key_names columns, administration_date, forecast, rmse, status, seconds
+    """
+    with process_pool(workers, blas_threads) as pool:
+        futures = [pool.submit(fit_series, key, values, steps, timeout=timeout, **model_kwargs)
+                   for key, values in series.items()]
+        results = [future.result() for future in futures]
+
+    rows = []
+    for result in results:
+        forecast = result['forecast'] if result['forecast'] is not None else pd.Series([np.nan], index=[pd.NaT])
+        for date, value in forecast.items():
+            rows.append(result['key'] + (date, value, result['rmse'], result['status'], result['seconds']))
+    return pd.DataFrame(rows, columns=list(key_names) + ['administration_date', 'forecast', 'rmse', 'status', 'seconds'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit one SARIMAX model per region (and optionally supplier or age range) in parallel.')
+    parser.add_argument('--data', default=None, help='CSV file or Parquet store (default: the dashboard dataset)')
+    parser.add_argument('--by', nargs='+', default=['region_name'], choices=['region_name', 'supplier', 'age_range'])
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--timeout', type=int, default=600)
+    parser.add_argument('--blas-threads', type=int, default=1)
+    parser.add_argument('--output', default='batch_forecast.csv')
+    args = parser.parse_args()
+
+    series = split_series(load_cube(args.data), by=args.by)
+    results = forecast_batch(series, key_names=args.by, steps=args.steps, workers=args.workers,
+                             timeout=args.timeout, blas_threads=args.blas_threads)
+    results.to_csv(args.output, index=False)
+    print(results.drop_duplicates(args.by)[args.by + ['rmse', 'status', 'seconds']].to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
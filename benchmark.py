@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cube import DOSE_COLUMNS
+from dashboard_pages import COLUMNS, PAGES, load_page
+from parallel import available_cores, process_pool
+from synthetic import generate
+
+
+# Default dataset sizes, as multiples of the base dataset
+SCALES = [1, 10, 100]
+
+# Default output, one JSON document per run
+RESULTS_PATH = 'benchmark_results.json'
+
+COUNT_COLUMNS = ['males', 'females'] + DOSE_COLUMNS
+
+CUBE_FILE = 'cube.npz'
+SUMMARY_FILE = 'region_summary.pkl'
+
+
+def _proc_status(field):
+    # Memory fields of /proc/self/status in bytes, None where it does not exist
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss():
+    """
+    Return the peak resident set size of this process in bytes, or None where it is not available.
+    """
+    # VmHWM starts again with every process, ru_maxrss is kept from the parent across exec
+    peak = _proc_status('VmHWM')
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def start_rss_measurement():
+    """
+    Reset the peak resident set size where the system allows it and return the current one.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    return _proc_status('VmRSS') or peak_rss()
+
+
+def write_scaled_dataset(data, scale, path, seed=0):
+    """
+    Write a synthetic dataset `scale` times the size of `data` as CSV, one copy at a time.
+
+    Each copy follows the previous one in time, so the number of dates grows
+    with the scale like a longer campaign would, and its counts are jittered.
+
+    Parameters:
+    - data: pandas DataFrame with the dashboard columns
+    - scale: int, number of copies
+    - path: str, destination CSV file
+    - seed: int, seed of the jitter
+
+    Returns:
+    - rows: int, number of rows written
+    """
+    rng = np.random.default_rng(seed)
+    dates = data['administration_date']
+    span = dates.max() - dates.min() + pd.Timedelta(days=1)
+
+    for copy in range(scale):
+        chunk = data.copy()
+        chunk['administration_date'] = dates + copy * span
+        if copy:
+            for column in COUNT_COLUMNS:
+                chunk[column] = np.round(chunk[column] * rng.uniform(0.8, 1.2, len(chunk))).astype(chunk[column].dtype)
+            chunk['dailytotal'] = chunk['males'] + chunk['females']
+        chunk.to_csv(path, mode='a' if copy else 'w', header=not copy, index=False)
+
+    return len(data) * scale
+
+
+def _payload_bytes(chart):
+    # Size of what Streamlit sends to the browser for the chart, its figure JSON
+    return len(chart.to_json().encode()) if chart is not None else 0
+
+
+def _run_load(csv_path, workdir):
+    # Parse the dataset and build what the dashboard builds before drawing a page
+    from aggregates import build_region_summary
+    from cube import AggregateCube
+    from data_loader import read_dataset
+
+    rss_before = start_rss_measurement()
+    start = time.perf_counter()
+    data = read_dataset(csv_path, COLUMNS)
+    cube = AggregateCube.from_frame(data)
+    region_summary = build_region_summary(data, cube)
+    seconds = time.perf_counter() - start
+
+    cube.save(os.path.join(workdir, CUBE_FILE))
+    region_summary.to_pickle(os.path.join(workdir, SUMMARY_FILE))
+
+    rss_after = peak_rss()
+    return {'page': 'load', 'seconds': seconds, 'serialize_seconds': 0.0, 'payload_bytes': 0,
+            'peak_rss_bytes': rss_after,
+            'rss_delta_bytes': rss_after - rss_before if rss_after is not None else None,
+            'charts': {}}
+
+
+def _run_page(workdir, page, repeat):
+    # Build every chart of a page `repeat` times from the saved cube and region summary
+    from cube import AggregateCube
+
+    cube, _ = AggregateCube.load(os.path.join(workdir, CUBE_FILE))
+    region_summary = pd.read_pickle(os.path.join(workdir, SUMMARY_FILE))
+    rss_before = start_rss_measurement()
+
+    charts = {}
+    for chart_id, build in load_page(page).CHARTS.items():
+        build_times, serialize_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chart = build(cube, region_summary)
+            build_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            payload_bytes = _payload_bytes(chart)
+            serialize_times.append(time.perf_counter() - start)
+
+        charts[chart_id] = {'seconds': statistics.median(build_times),
+                            'serialize_seconds': statistics.median(serialize_times),
+                            'payload_bytes': payload_bytes}
+
+    rss_after = peak_rss()
+    return {'page': page,
+            'seconds': sum(chart['seconds'] for chart in charts.values()),
+            'serialize_seconds': sum(chart['serialize_seconds'] for chart in charts.values()),
+            'payload_bytes': sum(chart['payload_bytes'] for chart in charts.values()),
+            'peak_rss_bytes': rss_after,
+            'rss_delta_bytes': rss_after - rss_before if rss_after is not None else None,
+            'charts': charts}
+
+
+def _isolated(function, *args):
+    # Each measurement runs in a fresh process so that the peak RSS is its own
+    with process_pool(1, blas_threads=available_cores()) as pool:
+        return pool.submit(function, *args).result()
+
+
+def run(data, scales=SCALES, pages=None, repeat=3, seed=0):
+    """
+    Benchmark the dashboard pages on synthetic datasets of several sizes.
+
+    For every scale the dataset is written to a temporary CSV file, then parsed
+    and aggregated ('load'), then the charts of every page are built and
+    serialized to JSON. Every measurement runs in its own worker process.
+
+    Parameters:
+    - data: pandas DataFrame, base dataset with the dashboard columns, copied
+      by write_scaled_dataset; or int, number of rows of the base dataset,
+      generated by synthetic.generate
+    - scales: list of int, dataset sizes as multiples of `data`
+    - pages: list of str, pages to benchmark (all pages if None)
+    - repeat: int, chart timings are the median of this many builds
+    - seed: int, seed of the synthetic data
+
+    Returns:
+    - results: list of dict, one per scale and page (and 'load'), with seconds,
+      serialize_seconds, payload_bytes, peak_rss_bytes, rss_delta_bytes and
+      the same numbers per chart
+    """
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = os.path.join(workdir, 'data.csv')
+            if isinstance(data, pd.DataFrame):
+                rows = write_scaled_dataset(data, scale, csv_path, seed)
+            else:
+                rows = data * scale
+                generate(rows, csv_path, seed=seed)
+
+            for result in [_isolated(_run_load, csv_path, workdir)] + [_isolated(_run_page, workdir, page, repeat) for page in pages or PAGES]:
+                results.append(dict(scale=scale, rows=rows, **result))
+                print(f"{scale:>4}x {rows:>11} rows  {result['page']:<25} {result['seconds']:8.3f} s  "
+                      f"{result['payload_bytes'] / 1e6:8.2f} MB  peak RSS {(result['peak_rss_bytes'] or 0) / 1e6:8.1f} MB")
+    return results
+
+
+def compare(results, baseline_path):
+    """
+    Print the time ratio of every scale and page against an earlier results file.
+    """
+    with open(baseline_path) as f:
+        baseline = {(row['scale'], row['page']): row for row in json.load(f)['results']}
+
+    for row in results:
+        before = baseline.get((row['scale'], row['page']))
+        if before and before['seconds'] > 0:
+            print(f"{row['scale']:>4}x {row['page']:<25} {row['seconds'] / before['seconds']:6.2f}x the baseline time")
+
+
+def main():
+    from data_loader import read_dataset
+
+    parser = argparse.ArgumentParser(description='Time the data preparation and figure construction of every dashboard page at several dataset sizes.')
+    parser.add_argument('--data', default=None, help='base dataset, CSV file or Parquet store (default: the dashboard dataset)')
+    parser.add_argument('--rows', type=int, default=None, help='generate a base dataset of this many rows with synthetic.py instead of copying --data')
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--pages', nargs='+', default=None, choices=list(PAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=None, help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    base = args.rows if args.rows is not None else read_dataset(args.data, COLUMNS)
+    results = run(base, args.scales, args.pages, args.repeat)
+
+    with open(args.output, 'w') as f:
+        json.dump({'created': pd.Timestamp.now().isoformat(),
+                   'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                                   'pandas': pd.__version__, 'numpy': np.__version__, 'cores': available_cores()},
+                   'results': results}, f, indent=1)
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
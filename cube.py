@@ -0,0 +1,268 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import storage
+from data_loader import cached_derived, dataset_version, read_dataset
+
+
+# Axes of the cube, in storage order
+DIMENSIONS = ['region_name', 'age_range', 'supplier', 'administration_date']
+
+DOSE_COLUMNS = ['first_dose', 'second_dose', 'previous_infection', 'additional_booster_dose', 'second_booster', 'db3']
+
+# Summed measures, 'rows' counts the raw rows falling in each cell
+MEASURES = DOSE_COLUMNS + ['males', 'females', 'dailytotal', 'rows']
+
+# Columns of the dataset the cube is built from
+SOURCE_COLUMNS = DIMENSIONS + [name for name in MEASURES if name != 'rows']
+
+# File kept inside a Parquet store with the cube of its current contents
+CUBE_FILE = '_cube.npz'
+
+
+def _factorize(column, labels=None):
+    """
+    Return integer codes and sorted labels for a column, or its codes in `labels` if given.
+    """
+    if labels is not None:
+        return labels.get_indexer(column), labels
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Categories are in file order, sort them and remap the codes like pd.factorize(sort=True)
+        categories = column.cat.categories
+        order = categories.argsort()
+        remap = np.empty(len(order) + 1, dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        remap[-1] = -1
+        return remap[column.cat.codes.to_numpy()], pd.Index(categories[order])
+
+    codes, labels = pd.factorize(column, sort=True)
+    return codes, pd.Index(labels)
+
+
+class AggregateCube:
+    """
+    Dense region x age_range x supplier x date x measure array of sums.
+
+    Charts are answered by summing along the axes they do not show, so their
+    cost depends on the number of distinct keys instead of the number of rows.
+    """
+
+    def __init__(self, labels, measures, values):
+        """
+        Parameters:
+        - labels: dict, mapping each dimension to a pandas Index of its labels
+        - measures: list of str, names of the last axis
+        - values: numpy array of shape (*[len(labels[d]) for d in DIMENSIONS], len(measures))
+        """
+        self.labels = labels
+        self.measures = list(measures)
+        self.values = values
+
+        # Version of the dataset the cube was built from, set by load_cube
+        self.version = None
+
+        # Filters the cube was cut with by select(), empty for the whole dataset
+        self.selection = {}
+
+    @classmethod
+    def from_frame(cls, data, labels=None):
+        """
+        Build the cube from a row-level DataFrame in one pass per measure.
+
+        Parameters:
+        - data: pandas DataFrame with the DIMENSIONS columns and the summed measures
+        - labels: dict, optional axis labels to use instead of the labels found in data,
+          rows whose keys are not in them are ignored
+
+        Returns:
+        - cube: AggregateCube
+        """
+        labels = dict(labels) if labels is not None else {}
+        codes = []
+        for dim in DIMENSIONS:
+            dim_codes, labels[dim] = _factorize(data[dim], labels.get(dim))
+            codes.append(dim_codes)
+
+        shape = tuple(len(labels[dim]) for dim in DIMENSIONS)
+        size = int(np.prod(shape))
+
+        # Rows with a missing key (code -1) cannot be placed in the cube
+        valid = np.ones(len(data), dtype=bool)
+        for dim_codes in codes:
+            valid &= dim_codes >= 0
+        flat = np.ravel_multi_index([dim_codes[valid] for dim_codes in codes], shape)
+
+        measures = [name for name in MEASURES if name == 'rows' or name in data.columns]
+        values = np.empty(shape + (len(measures),), dtype=np.int64)
+        for i, name in enumerate(measures):
+            if name == 'rows':
+                sums = np.bincount(flat, minlength=size)
+            else:
+                weights = data[name].to_numpy(dtype=np.float64)[valid]
+                sums = np.bincount(flat, weights=weights, minlength=size)
+            values[..., i] = sums.reshape(shape)
+
+        return cls(labels, measures, values)
+
+    def add_frame(self, data):
+        """
+        Add the rows of a DataFrame to the cube in place, growing the axes for new labels.
+
+        Parameters:
+        - data: pandas DataFrame with the same columns the cube was built from
+        """
+        labels = {dim: self.labels[dim].union(pd.Index(data[dim].unique())) for dim in DIMENSIONS}
+
+        if any(len(labels[dim]) != len(self.labels[dim]) for dim in DIMENSIONS):
+            values = np.zeros(tuple(len(labels[dim]) for dim in DIMENSIONS) + (len(self.measures),), dtype=self.values.dtype)
+            positions = [labels[dim].get_indexer(self.labels[dim]) for dim in DIMENSIONS]
+            values[np.ix_(*positions)] = self.values
+            self.labels, self.values = labels, values
+
+        update = AggregateCube.from_frame(data, labels=self.labels)
+        self.values += update.values[..., [update.measures.index(name) for name in self.measures]]
+
+    def save(self, path, version=None):
+        """
+        Write the cube to a .npz file.
+
+        Parameters:
+        - path: str, destination file
+        - version: tuple, optional version of the data the cube was built from
+        """
+        arrays = {f'labels_{dim}': np.asarray(self.labels[dim], dtype=str) for dim in DIMENSIONS}
+        arrays['labels_administration_date'] = np.asarray(self.labels['administration_date'], dtype='datetime64[ns]')
+        np.savez(path, values=self.values, measures=np.asarray(self.measures),
+                 version=np.asarray(version if version is not None else [], dtype=np.int64), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a cube written by save().
+
+        Returns:
+        - cube: AggregateCube
+        - version: tuple, the version passed to save()
+        """
+        with np.load(path) as arrays:
+            labels = {dim: pd.Index(arrays[f'labels_{dim}']) for dim in DIMENSIONS}
+            cube = cls(labels, arrays['measures'].tolist(), arrays['values'])
+            version = tuple(arrays['version'].tolist())
+        return cube, version
+
+    def select(self, start=None, end=None, **labels):
+        """
+        Cut the cube to a date range and to some labels of the other dimensions.
+
+        The axes are the index: dates are sorted, so the range is found by
+        binary search, and every label has a fixed position on its axis, so
+        the cost is O(log n + size of the result) instead of a scan of the rows.
+
+        Parameters:
+        - start, end: date-like, first and last date kept (inclusive), None for no bound
+        - labels: lists of labels to keep, by dimension (e.g. region_name=['Lazio']),
+          a missing or empty list keeps every label
+
+        Returns:
+        - cube: AggregateCube, a new cube sharing nothing with this one
+        """
+        dates = self.labels['administration_date']
+        first = dates.searchsorted(pd.Timestamp(start), side='left') if start is not None else 0
+        last = dates.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(dates)
+
+        positions = []
+        for dim in DIMENSIONS:
+            if dim == 'administration_date':
+                dim_positions = np.arange(first, last)
+            elif labels.get(dim):
+                dim_positions = self.labels[dim].get_indexer(labels[dim])
+                dim_positions = np.sort(dim_positions[dim_positions >= 0])
+            else:
+                dim_positions = np.arange(len(self.labels[dim]))
+            positions.append(dim_positions)
+
+        selected = AggregateCube({dim: self.labels[dim][dim_positions] for dim, dim_positions in zip(DIMENSIONS, positions)},
+                                 self.measures, self.values[np.ix_(*positions)])
+
+        bounds = {'start': start, 'end': end}
+        selected.selection = {name: value for name, value in bounds.items() if value is not None}
+        selected.selection.update({dim: list(labels[dim]) for dim in labels if labels[dim]})
+        if self.version is not None:
+            # Figures of the cut cube must not be served for the whole dataset
+            selected.version = tuple(self.version) + (repr(sorted(selected.selection.items())),)
+        return selected
+
+    def is_empty(self):
+        """
+        Tell whether no row falls in the cube.
+        """
+        return not self.values[..., self.measures.index('rows')].any()
+
+    def sum(self, by=(), measures=None):
+        """
+        Sum the cube over every dimension not listed in `by`.
+
+        Parameters:
+        - by: list of str, dimensions to keep, in the order of the output columns
+        - measures: list of str, measures to return (all measures if None)
+
+        Returns:
+        - result: pandas Series indexed by measure when `by` is empty,
+          otherwise a DataFrame with one row per observed combination of `by`,
+          ordered by the sorted labels of `by`
+        """
+        by = list(by)
+        measures = self.measures if measures is None else list(measures)
+        measure_idx = [self.measures.index(name) for name in measures]
+
+        summed_axes = tuple(i for i, dim in enumerate(DIMENSIONS) if dim not in by)
+        values = self.values.sum(axis=summed_axes)
+
+        if not by:
+            return pd.Series(values[measure_idx], index=measures)
+
+        # Reorder the kept axes to follow `by`
+        kept = [dim for dim in DIMENSIONS if dim in by]
+        values = np.moveaxis(values, [kept.index(dim) for dim in by], list(range(len(by))))
+
+        # Like groupby(observed=True): drop the combinations no row falls into
+        rows = values[..., self.measures.index('rows')].ravel()
+        values = values.reshape(-1, len(self.measures))[rows > 0][:, measure_idx]
+
+        index = pd.MultiIndex.from_product([self.labels[dim] for dim in by], names=by)[rows > 0]
+        return pd.DataFrame(values, columns=measures, index=index).reset_index()
+
+
+def load_cube(path=None, columns=None):
+    """
+    Build the cube once per dataset version and share it across sessions.
+
+    Only the cube is kept: the rows it is built from are read with
+    read_dataset and released once it is built.
+
+    Parameters:
+    - path: str, path to the CSV file or the Parquet store
+    - columns: list of str, columns to read (all columns if None)
+
+    Returns:
+    - cube: AggregateCube
+    """
+    def build(path):
+        version = dataset_version(path)
+
+        # A store keeps the cube of its current contents, maintained by ingest.py
+        if storage.is_store(path) and os.path.exists(os.path.join(path, CUBE_FILE)):
+            cube, saved_version = AggregateCube.load(os.path.join(path, CUBE_FILE))
+            if saved_version == version:
+                cube.version = version
+                return cube
+
+        cube = AggregateCube.from_frame(read_dataset(path, columns))
+        cube.version = version
+        return cube
+
+    name = ('cube', tuple(columns) if columns is not None else None)
+    return cached_derived(name, path, build)
@@ -0,0 +1,62 @@
+import importlib
+import os
+
+from aggregates import REGION_ATTRIBUTES, load_region_summary
+from cube import SOURCE_COLUMNS, load_cube
+
+
+# Every column a page may read, the rest of the dataset is never read
+COLUMNS = SOURCE_COLUMNS + REGION_ATTRIBUTES
+
+# Backend answering the aggregations: 'pandas' builds the cube in memory,
+# 'duckdb' runs them as SQL over the files (needs the optional duckdb package)
+BACKEND = os.environ.get('DASHBOARD_BACKEND', 'pandas')
+
+# Pages of the sidebar, in display order, with the module building each one.
+# Every module has SOURCES, the data it is built from ('cube' and/or
+# 'region_summary'), CHARTS, its chart functions by id, and render(cube, region_summary).
+# Modules are imported, with their plotting libraries, the first time their page is selected.
+PAGES = {
+    'Dashboard': 'dashboard_pages.overview',
+    'Age Range Investigation': 'dashboard_pages.age_range',
+    'GDP and Population': 'dashboard_pages.gdp_population',
+    'Regions in Details': 'dashboard_pages.region_details',
+    'Overtime Investigation': 'dashboard_pages.overtime',
+}
+
+
+def load_page(title):
+    """
+    Import the module of a page.
+    """
+    return importlib.import_module(PAGES[title])
+
+
+def load_sources(sources, path=None, backend=BACKEND):
+    """
+    Load only the data a page is built from.
+
+    The cube is built from SOURCE_COLUMNS, and the region summary adds the
+    regional attributes, read on their own when a page first needs them.
+    With the duckdb backend the cube is a duckdb_backend.SQLCube, which
+    answers the same sums without loading the dataset.
+
+    Parameters:
+    - sources: list of str, 'cube' and/or 'region_summary'
+    - path: str, path to the CSV file or the Parquet store
+    - backend: str, 'pandas' or 'duckdb'
+
+    Returns:
+    - cube: AggregateCube or SQLCube
+    - region_summary: pandas DataFrame, or None if the page does not use it
+    """
+    if backend == 'duckdb':
+        from duckdb_backend import load_sql_cube, load_sql_region_summary
+
+        cube = load_sql_cube(path)
+        region_summary = load_sql_region_summary(path) if 'region_summary' in sources else None
+        return cube, region_summary
+
+    cube = load_cube(path, SOURCE_COLUMNS)
+    region_summary = load_region_summary(path, SOURCE_COLUMNS) if 'region_summary' in sources else None
+    return cube, region_summary
@@ -0,0 +1,62 @@
+import pandas as pd
+import plotly.express as px
+
+from cube import DOSE_COLUMNS
+from dashboard_pages.common import show_chart
+from instrumentation import phase
+
+
+def age_distribution(cube, region_summary):
+    # Bar plot for Distribution of Age Range by Region
+    with phase('groupby'):
+        region_age_distribution = cube.sum(by=['region_name', 'age_range'], measures=['dailytotal'])
+    with phase('figure'):
+        return px.bar(region_age_distribution, title='Distribution of Age Range by Region', x='region_name', y='dailytotal', color='age_range',
+                      labels={'dailytotal': 'Count', 'region_name': 'Region', 'age_range': 'Age Range'},
+                      width=1000, height=700)
+
+
+def doses_by_age(cube, region_summary):
+    with phase('groupby'):
+        # Sum the doses for each age range
+        df_summed = cube.sum(by=['age_range'], measures=DOSE_COLUMNS)
+
+        # Melt the DataFrame to create a long-format for Plotly Express
+        df_melted = pd.melt(df_summed, id_vars=['age_range'], value_vars=DOSE_COLUMNS,
+                            var_name='Dose Type', value_name='Count')
+
+    # Create a bar plot
+    with phase('figure'):
+        return px.bar(df_melted, x='Dose Type', y='Count', color='age_range',
+                      labels={'Count': 'Count', 'age_range': 'Age Range', 'Dose Type': 'Dose Type'},
+                      title='Distribution of Doses by Age Range',
+                      width=1000, height=600)
+
+
+def age_by_supplier(cube, region_summary):
+    # Group by 'age_range', 'supplier', and sum 'dailytotal'
+    with phase('groupby'):
+        df_summed = cube.sum(by=['age_range', 'supplier'], measures=['dailytotal'])
+
+    # Create a bar plot
+    with phase('figure'):
+        return px.bar(df_summed, x='supplier', y='dailytotal', color='age_range',
+                      labels={'dailytotal': 'Total Count', 'age_range': 'Age Range', 'supplier': 'Supplier'},
+                      title='Distribution of Counts by Age Range and Supplier',
+                      width=1000, height=600)
+
+
+# Data the page is built from, see dashboard_pages.load_sources
+SOURCES = ['cube']
+
+# Charts of the page, by id, each built from the cube and the region summary
+CHARTS = {
+    'age_distribution': age_distribution,
+    'doses_by_age': doses_by_age,
+    'age_by_supplier': age_by_supplier,
+}
+
+
+def render(cube, region_summary):
+    for chart_id, build in CHARTS.items():
+        show_chart(chart_id, build, cube, region_summary)
@@ -0,0 +1,52 @@
+import json
+
+import streamlit as st
+
+from figure_cache import cache, figure_key
+from instrumentation import chart, phase
+
+
+def cached_payload(chart_id, build, cube, region_summary, **params):
+    """
+    Return the serialized result of a chart, built only when it is not in the figure cache.
+
+    Parameters:
+    - chart_id: str, key of the chart in its page's CHARTS
+    - build: callable returning a Plotly figure, or None when there is nothing to draw
+    - cube, region_summary: the data the chart is built from, the cache key uses cube.version
+    - params: widget values passed to build as keywords, part of the cache key
+
+    Returns:
+    - payload: str, the JSON of the figure, or '' when there is nothing to draw
+    """
+    def serialize():
+        fig = build(cube, region_summary, **params)
+        if fig is None:
+            return ''
+        with phase('serialization'):
+            return fig.to_json()
+
+    return cache.get_or_build(figure_key(chart_id, params, cube.version), serialize)
+
+
+def show_chart(chart_id, build, cube, region_summary, **params):
+    """
+    Draw a chart, from the figure cache when it was already built for the same parameters
+    and dataset, timing each phase when instrumentation is on.
+
+    Parameters:
+    - chart_id: str, key of the chart in its page's CHARTS
+    - build: callable returning a Plotly figure, or None when there is nothing to draw
+    - cube, region_summary, params: passed to build, see cached_payload
+
+    Returns:
+    - fig: dict, the figure drawn, or None
+    """
+    with chart(chart_id):
+        payload = cached_payload(chart_id, build, cube, region_summary, **params)
+        if not payload:
+            return None
+        with phase('serialization'):
+            fig = json.loads(payload)
+            st.plotly_chart(fig, use_container_width=True)  # Use container width for responsive plot size
+    return fig
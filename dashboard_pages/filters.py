@@ -0,0 +1,73 @@
+import streamlit as st
+
+from aggregates import select_region_summary
+
+
+# Dimensions filtered with a multiselect, with their sidebar labels
+CATEGORY_FILTERS = {
+    'region_name': 'Regions',
+    'supplier': 'Suppliers',
+    'age_range': 'Age Ranges',
+}
+
+# Session state key of the last complete date range picked
+LAST_DATE_RANGE = 'filters_last_date_range'
+
+
+def sidebar_filters(cube):
+    """
+    Draw the filters in the sidebar, with the labels of the whole cube as choices.
+
+    Parameters:
+    - cube: AggregateCube of the whole dataset
+
+    Returns:
+    - selection: dict, keyword arguments of AggregateCube.select, without the filters left empty
+    """
+    st.sidebar.subheader('Filters')
+
+    dates = cube.labels['administration_date']
+    first_date, last_date = dates[0].date(), dates[-1].date()
+    date_range = st.sidebar.date_input("Administration Date:", value=(first_date, last_date),
+                                       min_value=first_date, max_value=last_date)
+
+    # The range has a single date while the user is picking the second one:
+    # keep the last complete range until then, the whole dataset at first
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        st.session_state[LAST_DATE_RANGE] = tuple(date_range)
+    start, end = st.session_state.get(LAST_DATE_RANGE, (first_date, last_date))
+
+    selection = {}
+    if start > first_date:
+        selection['start'] = start
+    if end < last_date:
+        selection['end'] = end
+
+    for dim, label in CATEGORY_FILTERS.items():
+        # Nothing selected keeps every label
+        chosen = st.sidebar.multiselect(f"{label}:", list(cube.labels[dim]))
+        if chosen:
+            selection[dim] = chosen
+
+    return selection
+
+
+def apply_filters(cube, region_summary, selection):
+    """
+    Cut the data of a page to the selection.
+
+    Parameters:
+    - cube: AggregateCube of the whole dataset
+    - region_summary: pandas DataFrame, or None if the page does not use it
+    - selection: dict, as returned by sidebar_filters
+
+    Returns:
+    - cube, region_summary: the cut data, the same objects when nothing is selected
+    """
+    if not selection:
+        return cube, region_summary
+
+    cube = cube.select(**selection)
+    if region_summary is not None:
+        region_summary = select_region_summary(region_summary, cube)
+    return cube, region_summary
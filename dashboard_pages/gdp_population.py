@@ -0,0 +1,72 @@
+import plotly.express as px
+
+from dashboard_pages.common import show_chart
+from instrumentation import phase
+
+
+def daily_total_vs_population(cube, region_summary):
+    # Comparison of Daily Total with Population Residual for Each Region
+    with phase('groupby'):
+        region_stats_daily_total = region_summary[['region_name', 'dailytotal', 'pop_resid']]
+    with phase('figure'):
+        return px.scatter(region_stats_daily_total, title='Comparison of Daily Total with Population Residual for Each Region', x='dailytotal', y='pop_resid', color='region_name',
+                          labels={'dailytotal': 'Daily Total', 'pop_resid': 'Population Residual'},
+                          width=800, height=400)
+
+
+def daily_total_vs_gdp(cube, region_summary):
+    # Scatter plot for Comparison of dailytotal with GDP and Population for Each Region
+    with phase('groupby'):
+        region_stats_previous_infection = region_summary[['region_name', 'dailytotal', 'gdp_tot', 'pop_resid']].copy()
+        region_stats_previous_infection['gdp_tot'] *= 1000000
+        region_stats_previous_infection['pop_resid'] = region_stats_previous_infection['pop_resid'].fillna(0)
+    with phase('figure'):
+        return px.scatter(region_stats_previous_infection, title='Comparison of dailytotal with GDP and Population for Each Region', x='dailytotal', y='gdp_tot', size='pop_resid', color='region_name',
+                          labels={'dailytotal': 'Sum of dailytotal', 'gdp_tot': 'GDP Total', 'pop_resid': 'Population'},
+                          width=800, height=400)
+
+
+def bubble(cube, region_summary):
+    # Scatter plot for GDP, Population Residual, and Daily Total for Each Region (Bubble Plot)
+    with phase('groupby'):
+        region_stats_bubble = region_summary[['region_name', 'pop_resid', 'gdp_tot', 'dailytotal']]
+
+    # Create a bubble plot using Plotly Express
+    with phase('figure'):
+        return px.scatter(region_stats_bubble, x='gdp_tot', y='pop_resid', size='dailytotal', color='region_name',
+                          labels={'gdp_tot': 'GDP Total (Billion Euros)', 'pop_resid': 'Population Residual', 'dailytotal': 'Total Daily Vaccinations'},
+                          title='GDP, Population Residual, and Daily Total for Each Region ',
+                          size_max=30)  # Adjust size_max as needed
+
+
+def scatter_3d(cube, region_summary):
+    # Population Residual, GDP, and Daily Total for Each Region (3D Scatter Plot)
+    with phase('groupby'):
+        region_stats_3d = region_summary[['region_name', 'pop_resid', 'gdp_tot', 'dailytotal']]
+
+        region_stats_3d = region_stats_3d.dropna(subset=['pop_resid', 'gdp_tot'])  # Remove rows with NaN values
+
+    # Create a 3D scatter plot
+    with phase('figure'):
+        return px.scatter_3d(region_stats_3d, x='pop_resid', y='gdp_tot', z='dailytotal',
+                             color='region_name', size='dailytotal',
+                             labels={'pop_resid': 'Population Residual', 'gdp_tot': 'GDP Total (Billion Euros)', 'dailytotal': 'Total Daily Vaccinations'},
+                             title='Population Residual, GDP, and Daily Total for Each Region (3D Scatter Plot)',
+                             size_max=30)  # Adjust size_max as needed
+
+
+# Data the page is built from, see dashboard_pages.load_sources
+SOURCES = ['region_summary']
+
+# Charts of the page, by id, each built from the cube and the region summary
+CHARTS = {
+    'daily_total_vs_population': daily_total_vs_population,
+    'daily_total_vs_gdp': daily_total_vs_gdp,
+    'bubble': bubble,
+    'scatter_3d': scatter_3d,
+}
+
+
+def render(cube, region_summary):
+    for chart_id, build in CHARTS.items():
+        show_chart(chart_id, build, cube, region_summary)
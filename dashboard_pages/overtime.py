@@ -0,0 +1,88 @@
+import plotly.express as px
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from aggregates import daily_series
+from cube import DOSE_COLUMNS
+from dashboard_pages.common import show_chart
+from instrumentation import phase
+from plotting import MAX_POINTS, date_window, downsample, lttb, render_mode, scatter_trace
+
+
+def date_range(cube):
+    """
+    Return the first and last dates of the cube.
+    """
+    dates = cube.labels['administration_date']
+    return dates.min().date(), dates.max().date()
+
+
+def supplier_overtime(cube, region_summary, zoom=None, max_points=MAX_POINTS):
+    # Line plot for Daily Vaccination Counts Over Time by Supplier, over the zoom window (all dates if None)
+    zoom_start, zoom_end = zoom or date_range(cube)
+    with phase('groupby'):
+        supplier_overtime = date_window(daily_series(cube, by='supplier'), zoom_start, zoom_end)
+        supplier_overtime = downsample(supplier_overtime, 'administration_date', 'dailytotal', max_points, by='supplier')
+
+    # Create an interactive line plot using Plotly Express, one point per date and supplier
+    with phase('figure'):
+        fig = px.line(supplier_overtime, x='administration_date', y='dailytotal', color='supplier',
+                      labels={'dailytotal': 'Daily Vaccination Count'},
+                      title='Vaccination Counts Over Time by Supplier',
+                      render_mode=render_mode(len(supplier_overtime)))
+
+        # Add a range slider for date selection
+        fig.update_layout(xaxis_rangeslider_visible=True)
+    return fig
+
+
+def doses_overtime(cube, region_summary, zoom=None, max_points=MAX_POINTS):
+    # Subplot for Number of Doses Administered Over Time
+    zoom_start, zoom_end = zoom or date_range(cube)
+    with phase('groupby'):
+        DosesOverTime_df = daily_series(cube, measures=DOSE_COLUMNS)
+        DosesOverTime_df = date_window(DosesOverTime_df, zoom_start, zoom_end).set_index('administration_date')
+
+        # Downsample each column on its own, then switch to WebGL if the figure is still dense
+        kept_points = {column: lttb(DosesOverTime_df.index, DosesOverTime_df[column], max_points) for column in DosesOverTime_df.columns}
+        Scatter = scatter_trace(sum(len(kept) for kept in kept_points.values()))
+
+    with phase('figure'):
+        fig = make_subplots(rows=1, cols=1)
+
+        # Iterate over the columns and add traces
+        for column, kept in kept_points.items():
+            fig.add_trace(Scatter(x=DosesOverTime_df.index[kept], y=DosesOverTime_df[column].iloc[kept], mode='lines', name=column, line=dict(width=2.5)))
+
+        # Add a range slider for date selection
+        fig.update_layout(xaxis_rangeslider_visible=True)
+
+        # Update layout for better presentation
+        fig.update_layout(title_text='Number of Doses Administered Over Time',
+                          xaxis_title='Administration Date',
+                          yaxis_title='Cumulative Count',
+                          legend_title='Dose Type')
+    return fig
+
+
+# Data the page is built from, see dashboard_pages.load_sources
+SOURCES = ['cube']
+
+# Charts of the page, by id, each built from the cube and the region summary
+CHARTS = {
+    'supplier_overtime': supplier_overtime,
+    'doses_overtime': doses_overtime,
+}
+
+
+def render(cube, region_summary):
+    # Zoom window: the charts below are rebuilt from this date range at up to MAX_POINTS points per line
+    first_date, last_date = date_range(cube)
+    zoom = (first_date, last_date)
+    # A single date has nothing to zoom into
+    if first_date < last_date:
+        zoom = st.slider("Date Range:", min_value=first_date, max_value=last_date, value=zoom)
+    max_points = st.sidebar.number_input("Max Points per Line:", min_value=10, value=MAX_POINTS, step=100)
+
+    show_chart('supplier_overtime', supplier_overtime, cube, region_summary, zoom=zoom, max_points=max_points)
+    show_chart('doses_overtime', doses_overtime, cube, region_summary, zoom=zoom, max_points=max_points)
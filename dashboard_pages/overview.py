@@ -0,0 +1,116 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from aggregates import daily_series
+from cube import DOSE_COLUMNS
+from dashboard_pages import BACKEND, load_sources
+from dashboard_pages.common import show_chart
+from data_loader import cached_derived
+from instrumentation import chart, phase
+from plotting import render_mode
+
+
+def daily_chart(cube, region_summary):
+    # Line chart for dailytotal over time, one point per date
+    with phase('groupby'):
+        daily_totals = daily_series(cube)
+    with phase('figure'):
+        fig = px.line(daily_totals, x='administration_date', y='dailytotal', title='Daily Vaccination Over Time',
+                      render_mode=render_mode(len(daily_totals)))
+        fig.update_layout(height=400)  # Set the height to your desired value
+    return fig
+
+
+def doses_chart(cube, region_summary):
+    # Bar plot for Total Number of Doses by Dose Type
+    with phase('groupby'):
+        dose_sums = cube.sum(measures=DOSE_COLUMNS)
+        df_plot = pd.DataFrame({'Dose Type': dose_sums.index, 'Count': dose_sums.values})
+    with phase('figure'):
+        return px.bar(df_plot, x='Dose Type', y='Count', title='Total Number of Doses by Dose Type',
+                      labels={'Count': 'Total Number of Doses'})
+
+
+def suppliers_pie(cube, region_summary):
+    # Pie chart for suppliers
+    with phase('groupby'):
+        supplier_counts = cube.sum(by=['supplier'], measures=['rows'])
+    with phase('figure'):
+        return px.pie(supplier_counts, title='Vaccination Suppliers Distribution', names='supplier', values='rows')
+
+
+def region_data(region_summary):
+    """
+    Return the regions sorted by dailytotal, with the columns of the top regions table.
+    """
+    region_data = region_summary[['region_name', 'dailytotal', 'males', 'females', 'gdp_tot', 'pop_resid']]
+
+    # Sort the DataFrame by dailytotal in descending order
+    return region_data.sort_values(by='dailytotal', ascending=False)
+
+
+def load_region_data(path=None, backend=BACKEND):
+    """
+    Sort the regions once per dataset version and share them across sessions,
+    so the top regions table only has to take the first rows.
+
+    Parameters:
+    - path: str, path to the CSV file or the Parquet store
+    - backend: str, passed to load_sources
+
+    Returns:
+    - region_data: pandas DataFrame, see region_data
+    """
+    def build(path):
+        _, region_summary = load_sources(['region_summary'], path, backend)
+        return region_data(region_summary)
+
+    return cached_derived(('region_data', backend), path, build)
+
+
+# A fragment: moving the slider reruns only this function, not the whole page
+@st.fragment
+def top_regions_table(sorted_regions):
+    # Allow user to adjust the number of displayed rows, when the filters leave more than one region
+    num_rows = len(sorted_regions)
+    if num_rows > 1:
+        num_rows = st.slider("Number of Regions to Display:", min_value=1, max_value=num_rows, value=min(5, num_rows))
+
+    # Display the highlighted table, the regions are already sorted
+    with chart('top_regions'):
+        with phase('groupby'):
+            table = sorted_regions.head(num_rows)
+        with phase('serialization'):
+            st.table(table.style.highlight_max(axis=0, subset=['dailytotal'], color='black'))
+
+
+# Data the page is built from, see dashboard_pages.load_sources
+SOURCES = ['cube', 'region_summary']
+
+# Charts of the page, by id, each built from the cube and the region summary
+CHARTS = {
+    'daily_chart': daily_chart,
+    'doses_chart': doses_chart,
+    'suppliers_pie': suppliers_pie,
+}
+
+
+def render(cube, region_summary):
+    show_chart('daily_chart', daily_chart, cube, region_summary)
+
+    # Create a layout with two columns (col1 and col2)
+    col1, col2 = st.columns(2)
+
+    # Bar plot for Total Number of Doses by Dose Type (placed in the first column)
+    with col1:
+        show_chart('doses_chart', doses_chart, cube, region_summary)
+
+    # Pie chart for suppliers (placed in the second column)
+    with col2:
+        show_chart('suppliers_pie', suppliers_pie, cube, region_summary)
+
+    # The top regions table reruns on its own when its slider moves,
+    # the regions of the whole dataset are sorted once per dataset version
+    top_regions_table(region_data(region_summary) if cube.selection else load_region_data())
+
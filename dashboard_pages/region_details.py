@@ -0,0 +1,105 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from cube import DOSE_COLUMNS
+from dashboard_pages.common import show_chart
+from instrumentation import phase
+
+
+# Regions without GDP values in ita_reg_ann_data.csv
+REGIONS_WITHOUT_GDP = ['Valle d\'Aosta / Vallée d\'Aoste', 'Provincia Autonoma Trento', 'Provincia Autonoma Bolzano / Bozen', 'Friuli-Venezia Giulia']
+
+
+def population_bar(cube, region_summary):
+    # Population Residual for Each Region (Horizontal Bar Plot)
+    with phase('groupby'):
+        unique_pop_resid = region_summary[['region_name', 'pop_resid', 'dailytotal']]
+        unique_pop_resid = unique_pop_resid[unique_pop_resid['pop_resid'].notnull()]  # Remove empty columns
+
+    # Create a horizontal bar plot
+    with phase('figure'):
+        fig = px.bar(unique_pop_resid, x='pop_resid', y='region_name',
+                     labels={'pop_resid': 'Population Residual', 'dailytotal': 'Total Daily Vaccinations'},
+                     title='Population Residual for Each Region (Horizontal Bar Plot)',
+                     orientation='h')
+
+        # Update x-axis title
+        fig.update_layout(xaxis_title='Population Residual')
+    return fig
+
+
+def doses_by_region(cube, region_summary):
+    # Stacked bar plot for Distribution of Vaccination Doses by Region
+    with phase('groupby'):
+        df_summed = region_summary[['region_name'] + DOSE_COLUMNS]
+        df_melted = pd.melt(df_summed, id_vars=['region_name'], value_vars=DOSE_COLUMNS,
+                            var_name='Dose Type', value_name='Count')
+    with phase('figure'):
+        return px.bar(df_melted, x='Count', y='region_name', color='Dose Type',
+                      labels={'Count': 'Count', 'Dose Type': 'Dose Type'},
+                      title='Distribution of Vaccination Doses by Region',
+                      orientation='h', barmode='stack')
+
+
+def supplier_distribution(cube, region_summary):
+    # Bar plot for Distribution of Suppliers by Region (Weighted by dailytotal)
+    with phase('groupby'):
+        supplier_region_weighted_counts = cube.sum(by=['region_name', 'supplier'], measures=['dailytotal']).rename(columns={'dailytotal': 'Weighted_Count'})
+    with phase('figure'):
+        return px.bar(supplier_region_weighted_counts, x='Weighted_Count', y='region_name', color='supplier',
+                      labels={'Weighted_Count': 'Weighted Occurrences'},
+                      title='Distribution of Suppliers by Region (Weighted by dailytotal)',
+                      orientation='h')
+
+
+def gdp_bar(cube, region_summary):
+    """
+    Return the GDP bar plot, or None if no region has a GDP value.
+    """
+    with phase('groupby'):
+        # Group by region and get the first GDP value for each region
+        region_gdp = region_summary[['region_name', 'gdp_tot']]
+
+        # Drop rows with NaN values in the 'gdp_tot' column
+        region_gdp = region_gdp.dropna(subset=['gdp_tot'])
+
+        # Drop specified regions
+        region_gdp = region_gdp[~region_gdp['region_name'].isin(REGIONS_WITHOUT_GDP)]
+
+    # Check if there are any valid rows left after dropping NaN values and regions with no GDP
+    if region_gdp.empty:
+        return None
+
+    # Create a bar plot
+    with phase('figure'):
+        fig = px.bar(region_gdp, x='region_name', y='gdp_tot',
+                     labels={'gdp_tot': 'GDP Total'},
+                     title='GDP for Each Region (Bar Plot)')
+
+        # Update layout for better presentation
+        fig.update_layout(xaxis_title='Region', yaxis_title='GDP Total (Billion Euros)')
+    return fig
+
+
+# Data the page is built from, see dashboard_pages.load_sources
+SOURCES = ['cube', 'region_summary']
+
+# Charts of the page, by id, each built from the cube and the region summary
+CHARTS = {
+    'population_bar': population_bar,
+    'doses_by_region': doses_by_region,
+    'supplier_distribution': supplier_distribution,
+    'gdp_bar': gdp_bar,
+}
+
+
+def render(cube, region_summary):
+    show_chart('population_bar', population_bar, cube, region_summary)
+    show_chart('doses_by_region', doses_by_region, cube, region_summary)
+    show_chart('supplier_distribution', supplier_distribution, cube, region_summary)
+
+    # GDP for Each Region (Bar Plot)
+    st.subheader('GDP for Each Region (Bar Plot)')
+    if show_chart('gdp_bar', gdp_bar, cube, region_summary) is None:
+        st.write("No valid data available for GDP. Please check your dataset.")
@@ -0,0 +1,123 @@
+import os
+import threading
+
+import pandas as pd
+
+import storage
+
+
+# Default dataset used by the dashboard, the Parquet store is preferred when it exists
+DATA_PATH = 'ItvaccinationMergedMap.csv'
+STORE_PATH = storage.STORE_PATH
+
+# Explicit column types so pandas does not have to infer them on every parse
+DTYPES = {
+    'supplier': 'category',
+    'region': 'category',
+    'age_range': 'category',
+    'NUTS1_code': 'category',
+    'NUTS1_description': 'category',
+    'NUTS2_code': 'category',
+    'region_name': 'category',
+    'ISTAT_regional_code': 'int16',
+    'males': 'int32',
+    'females': 'int32',
+    'first_dose': 'int32',
+    'second_dose': 'int32',
+    'previous_infection': 'int32',
+    'additional_booster_dose': 'int32',
+    'second_booster': 'int32',
+    'db3': 'int32',
+    'dailytotal': 'int64',
+    'pop_resid': 'float64',
+    'gdp_tot': 'float64',
+    'dens_ab': 'float64',
+    'lat': 'float64',
+    'long': 'float64',
+}
+
+DATE_COLUMNS = ['administration_date']
+
+# Values derived from the datasets (cubes, summaries), shared by all sessions of the process
+_cache = {}
+_lock = threading.RLock()
+
+
+def default_path():
+    """
+    Return the Parquet store if it has been built, the merged CSV file otherwise.
+    """
+    return STORE_PATH if storage.is_store(STORE_PATH) else DATA_PATH
+
+
+def dataset_version(path=None):
+    """
+    Return a cheap fingerprint of the dataset on disk.
+
+    Parameters:
+    - path: str, path to the CSV file or the Parquet store
+
+    Returns:
+    - version: tuple, (size in bytes, modification time in ns) for a file,
+      see storage.store_version for a store
+    """
+    path = path or default_path()
+    if storage.is_store(path):
+        return storage.store_version(path)
+
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def read_dataset(path=None, columns=None):
+    """
+    Parse the dataset with the explicit dtype map and clean it.
+
+    Parameters:
+    - path: str, path to the CSV file or the Parquet store
+    - columns: list of str, columns to read (all columns if None)
+
+    Returns:
+    - data: pandas DataFrame
+    """
+    path = path or default_path()
+    if storage.is_store(path):
+        data = storage.read_dataset(path, columns=columns, dtypes=DTYPES)
+    else:
+        parse_dates = [name for name in DATE_COLUMNS if columns is None or name in columns]
+        data = pd.read_csv(path, usecols=columns, dtype=DTYPES, parse_dates=parse_dates)
+
+    # Replace NaN values in the 'gdp_tot' column with 0
+    if 'gdp_tot' in data.columns:
+        data['gdp_tot'] = data['gdp_tot'].fillna(0)
+
+    return data
+
+
+def cached_derived(name, path, build):
+    """
+    Compute a value from the dataset once per dataset version.
+
+    The value is kept in memory for the lifetime of the process and is rebuilt
+    only when the size or the modification time of the file changes.
+
+    Parameters:
+    - name: hashable, identifier of the derived value
+    - path: str, path to the dataset
+    - build: callable, function receiving the path and returning the value
+
+    Returns:
+    - value: the cached result of build(path)
+    """
+    path = path or default_path()
+    key = (name, os.path.abspath(path))
+    version = dataset_version(path)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        value = build(path)
+        _cache[key] = (version, value)
+        return value
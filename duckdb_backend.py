@@ -0,0 +1,235 @@
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+import storage
+from aggregates import REGION_ATTRIBUTES, build_region_summary
+from cube import DIMENSIONS, MEASURES
+from data_loader import cached_derived, dataset_version, default_path
+
+
+# Memory DuckDB may use before spilling to disk, e.g. '2GB' (DuckDB's default if unset)
+MEMORY_LIMIT = os.environ.get('DASHBOARD_DUCKDB_MEMORY')
+
+# Where DuckDB spills the aggregations that do not fit in memory
+TEMP_DIRECTORY = os.path.join(tempfile.gettempdir(), 'dashboard_duckdb')
+
+# One in-process database shared by all sessions, each query runs on its own cursor
+_connection = None
+_lock = threading.Lock()
+
+
+def connection():
+    """
+    Open the embedded database the first time it is needed.
+
+    DuckDB is an optional dependency, only imported when the backend is used.
+    """
+    global _connection
+    with _lock:
+        if _connection is None:
+            try:
+                import duckdb
+            except ImportError:
+                raise ImportError('The duckdb backend needs the duckdb package: pip install duckdb') from None
+
+            config = {'temp_directory': TEMP_DIRECTORY}
+            if MEMORY_LIMIT:
+                config['memory_limit'] = MEMORY_LIMIT
+            _connection = duckdb.connect(config=config)
+        return _connection
+
+
+def _literal(value):
+    # SQL string literal, table functions do not take bound file names
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def source_sql(path):
+    """
+    Return the SQL table expression reading the dataset, a CSV file or a Parquet store.
+    """
+    if storage.is_store(path):
+        pattern = os.path.join(path, '**', '*.parquet')
+        return f"read_parquet({_literal(pattern)}, hive_partitioning = true)"
+    return f"read_csv({_literal(path)}, header = true)"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _aggregate(name):
+    # 'rows' counts the raw rows, like the 'rows' measure of the cube
+    if name == 'rows':
+        return 'COUNT(*) AS "rows"'
+    return f'CAST(COALESCE(SUM({_quote(name)}), 0) AS BIGINT) AS {_quote(name)}'
+
+
+def _select_dimension(dim):
+    if dim == 'administration_date':
+        return f'CAST({_quote(dim)} AS TIMESTAMP) AS {_quote(dim)}'
+    return _quote(dim)
+
+
+class SQLCube:
+    """
+    Drop-in replacement of AggregateCube answering every sum with SQL over the files.
+
+    DuckDB scans only the columns (and, for a store, the partitions) a query
+    needs, with all cores, and spills to TEMP_DIRECTORY what does not fit in
+    memory, so the dataset is never loaded into a DataFrame.
+    """
+
+    def __init__(self, path, conditions=(), parameters=(), selection=None, version=None):
+        """
+        Parameters:
+        - path: str, path to the CSV file or the Parquet store
+        - conditions: list of str, SQL conditions on the rows, with ? placeholders
+        - parameters: list, values of the placeholders
+        - selection: dict, filters the cube was cut with by select()
+        - version: tuple, version of the dataset
+        """
+        self.path = path
+        self.measures = list(MEASURES)
+        self.conditions = list(conditions)
+        self.parameters = list(parameters)
+        self.selection = dict(selection or {})
+        self.version = version
+        self._labels = None
+
+    def _where(self):
+        # Rows with a missing key are not part of the cube
+        conditions = [f'{_quote(dim)} IS NOT NULL' for dim in DIMENSIONS] + self.conditions
+        return ' AND '.join(conditions)
+
+    def query(self, sql):
+        """
+        Run a query over the rows of the cube, {source} and {where} are filled in.
+
+        Returns:
+        - result: pandas DataFrame
+        """
+        sql = sql.format(source=source_sql(self.path), where=self._where())
+        return connection().cursor().execute(sql, self.parameters).fetchdf()
+
+    @property
+    def labels(self):
+        """
+        Sorted labels of every dimension, read once per cube.
+        """
+        if self._labels is None:
+            labels = {}
+            for dim in DIMENSIONS:
+                result = self.query(f'SELECT DISTINCT {_select_dimension(dim)} FROM {{source}} WHERE {{where}} ORDER BY 1')
+                values = result[dim]
+                labels[dim] = pd.DatetimeIndex(values) if dim == 'administration_date' else pd.Index(values.astype(str))
+            self._labels = labels
+        return self._labels
+
+    def sum(self, by=(), measures=None):
+        """
+        Sum the measures over every dimension not listed in `by`, see AggregateCube.sum.
+
+        The rows are ordered by the labels of `by`, like the sorted axes of the
+        cube, so both backends give the charts the same trace order.
+        """
+        by = list(by)
+        measures = self.measures if measures is None else list(measures)
+        columns = [_select_dimension(dim) for dim in by] + [_aggregate(name) for name in measures]
+
+        sql = f"SELECT {', '.join(columns)} FROM {{source}} WHERE {{where}}"
+        if by:
+            keys = ', '.join(str(i + 1) for i in range(len(by)))
+            sql += f' GROUP BY {keys} ORDER BY {keys}'
+
+        result = self.query(sql)
+        if not by:
+            return result.iloc[0].astype('int64')
+        return result
+
+    def select(self, start=None, end=None, **labels):
+        """
+        Cut the cube to a date range and to some labels, see AggregateCube.select.
+
+        The filters become conditions of every later query; on a store the
+        partitions of other months and regions are skipped without being opened.
+        """
+        conditions, parameters = list(self.conditions), list(self.parameters)
+        is_store = storage.is_store(self.path)
+
+        if start is not None:
+            if is_store:
+                conditions.append(f'{storage.MONTH_COLUMN} >= ?')
+                parameters.append(pd.Timestamp(start).strftime('%Y-%m'))
+            conditions.append('CAST(administration_date AS TIMESTAMP) >= ?')
+            parameters.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            if is_store:
+                conditions.append(f'{storage.MONTH_COLUMN} <= ?')
+                parameters.append(pd.Timestamp(end).strftime('%Y-%m'))
+            # Inclusive like AggregateCube.select: everything before the next day
+            conditions.append('CAST(administration_date AS TIMESTAMP) < ?')
+            parameters.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_pydatetime())
+
+        for dim in DIMENSIONS:
+            if dim != 'administration_date' and labels.get(dim):
+                conditions.append(f"{_quote(dim)} IN ({', '.join('?' for _ in labels[dim])})")
+                parameters.extend(str(label) for label in labels[dim])
+
+        bounds = {'start': start, 'end': end}
+        selection = dict(self.selection)
+        selection.update({name: value for name, value in bounds.items() if value is not None})
+        selection.update({dim: list(labels[dim]) for dim in labels if labels[dim]})
+
+        version = None
+        if self.version is not None:
+            version = tuple(self.version) + (repr(sorted(selection.items())),)
+        return SQLCube(self.path, conditions, parameters, selection, version)
+
+    def is_empty(self):
+        """
+        Tell whether no row falls in the cube.
+        """
+        return self.query('SELECT COUNT(*) AS "rows" FROM (SELECT 1 FROM {source} WHERE {where} LIMIT 1)')['rows'][0] == 0
+
+    def first_values(self, columns):
+        """
+        Return the first non-null value of each column per region, for the regional attributes.
+
+        Parameters:
+        - columns: list of str
+
+        Returns:
+        - values: pandas DataFrame with 'region_name' and the columns, one row per region
+        """
+        # The attributes are constant within a region, any non-null row gives the value
+        values = ', '.join(f'first({_quote(name)}) FILTER (WHERE {_quote(name)} IS NOT NULL) AS {_quote(name)}'
+                           for name in columns)
+        return self.query(f'SELECT region_name, {values} FROM {{source}} WHERE {{where}} GROUP BY 1 ORDER BY 1')
+
+
+def load_sql_cube(path=None):
+    """
+    Return the SQL cube of a dataset, shared across sessions like load_cube.
+    """
+    def build(path):
+        return SQLCube(path, version=dataset_version(path))
+
+    return cached_derived('sql_cube', path or default_path(), build)
+
+
+def load_sql_region_summary(path=None):
+    """
+    Compute the region summary with SQL once per dataset version, see aggregates.load_region_summary.
+    """
+    def build(path):
+        cube = load_sql_cube(path)
+        attributes = cube.first_values(REGION_ATTRIBUTES)
+        # Like read_dataset, a region without GDP counts as 0
+        attributes['gdp_tot'] = attributes['gdp_tot'].fillna(0)
+        return build_region_summary(attributes, cube)
+
+    return cached_derived('sql_region_summary', path or default_path(), build)
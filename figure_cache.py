@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+# Memory budget of the cache, in megabytes of serialized JSON
+BUDGET_MB = float(os.environ.get('FIGURE_CACHE_MB', 64))
+
+
+class FigureCache:
+    """
+    Serialized figures kept in memory, evicting the least recently used ones
+    once their total size exceeds the budget.
+
+    Keys are built by figure_key from the chart id, the widget parameters and
+    the dataset version, so an entry is never stale: a new dataset version
+    gives new keys and the old entries age out.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the serialized figure stored under key, or None.
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """
+        Store a serialized figure, evicting the least recently used ones to stay within the budget.
+
+        Payloads larger than the whole budget are not stored.
+        """
+        size = len(payload)
+        if size > self.budget_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+
+            self._entries[key] = payload
+            self.size_bytes += size
+
+            while self.size_bytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+
+    def get_or_build(self, key, build):
+        """
+        Return the payload stored under key, or build, store and return it.
+
+        Parameters:
+        - key: hashable, from figure_key, or None to bypass the cache
+        - build: callable without arguments returning the serialized figure (str)
+        """
+        if key is not None:
+            payload = self.get(key)
+            if payload is not None:
+                return payload
+
+        payload = build()
+        if key is not None:
+            self.put(key, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def figure_key(chart_id, params, version):
+    """
+    Build the cache key of a chart.
+
+    Parameters:
+    - chart_id: str, id of the chart in its page's CHARTS
+    - params: dict, widget values the chart depends on (num_rows, zoom, ...)
+    - version: tuple, version of the dataset, None if unknown
+
+    Returns:
+    - key: tuple, or None when the dataset version is unknown and the chart must not be cached
+    """
+    if version is None:
+        return None
+    return (chart_id, tuple(sorted((name, repr(value)) for name, value in params.items())), tuple(version))
+
+
+# Figures shared by all sessions of the process, like the datasets of data_loader
+cache = FigureCache(int(BUDGET_MB * 2 ** 20))
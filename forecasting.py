@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.seasonal import STL
+
+
+def stl_forecast(time_series, period, forecast_steps, freq='D'):
+    """
+    Decompose the series once with STL and project its components forward.
+
+    The trend is extended linearly with its average slope over the last seasonal
+    cycle and the last seasonal cycle is repeated, so the whole horizon is
+    computed in one vectorized step instead of one decomposition per step.
+
+    Parameters:
+    - time_series: pandas Series, the input time series
+    - period: int, the seasonal period of the time series
+    - forecast_steps: int, the number of steps to forecast into the future
+    - freq: str, frequency of the forecast index
+
+    Returns:
+    - forecast: pandas Series, the forecasted values
+    """
+    result = STL(time_series, period=period).fit()
+    trend = np.asarray(result.trend, dtype=np.float64)
+    seasonal = np.asarray(result.seasonal, dtype=np.float64)
+
+    steps = np.arange(1, forecast_steps + 1)
+
+    # Linear trend from the average slope over the last cycle
+    window = min(period, len(trend) - 1)
+    slope = (trend[-1] - trend[-1 - window]) / window if window > 0 else 0.0
+    trend_forecast = trend[-1] + slope * steps
+
+    # Repeat the last observed cycle, continuing from where the series ends
+    last_cycle = seasonal[-period:]
+    seasonal_forecast = last_cycle[(steps - 1) % len(last_cycle)]
+
+    forecast_index = pd.date_range(time_series.index[-1], periods=forecast_steps + 1, freq=freq)[1:]
+    return pd.Series(trend_forecast + seasonal_forecast, index=forecast_index)
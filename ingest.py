@@ -0,0 +1,221 @@
+import argparse
+import csv
+import json
+import os
+
+import pandas as pd
+
+import storage
+from cube import CUBE_FILE, AggregateCube
+from data_loader import DTYPES, read_dataset
+from regions import REGIONS_PATH, join_regional_attributes, load_regional_attributes
+
+
+# Upstream open-data file used by the notebook pipeline
+UPSTREAM_PATH = 'italian_vaccination.csv'
+
+# Small JSON file kept inside the store with the last ingested administration date
+STATE_FILE = '_ingest_state.json'
+
+
+def last_ingested_date(root):
+    """
+    Return the last administration date present in a store, or None for a new store.
+
+    Parameters:
+    - root: str, directory of the store
+
+    Returns:
+    - last_date: pandas Timestamp or None
+    """
+    state_path = os.path.join(root, STATE_FILE)
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            return pd.Timestamp(json.load(f)['last_date'])
+
+    if not storage.is_store(root):
+        return None
+
+    # No state yet: only the newest month partition has to be read
+    months = sorted(name.split('=', 1)[1] for name in os.listdir(root) if name.startswith(storage.MONTH_COLUMN + '='))
+    if not months:
+        return None
+    dates = storage.read_dataset(root, columns=['administration_date'], start=months[-1] + '-01')['administration_date']
+    return dates.max() if len(dates) else None
+
+
+def _save_state(root, last_date):
+    # Replaced atomically, an interrupted write leaves the previous state
+    state_path = os.path.join(root, STATE_FILE)
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump({'last_date': pd.Timestamp(last_date).strftime('%Y-%m-%d')}, f)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def _first_row_after(f, data_start, size, date_position, last_date):
+    """
+    Binary search the byte offset of the first line whose date is after last_date.
+    """
+    def line_start(position):
+        # Start of the first complete line after position
+        f.seek(position)
+        if position > data_start:
+            f.readline()
+        return f.tell()
+
+    last_date = last_date.strftime('%Y-%m-%d')
+    lo, hi = data_start, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        line_start(mid)
+        line = f.readline().decode('utf-8')
+        if not line.strip() or next(csv.reader([line]))[date_position] > last_date:
+            hi = mid
+        else:
+            lo = mid + 1
+    return line_start(lo)
+
+
+def read_new_rows(path, last_date=None):
+    """
+    Read the rows of the upstream file administered after last_date.
+
+    The upstream file is sorted by administration_date, so the first new row is
+    found with a binary search on byte offsets and only the tail of the file is parsed.
+
+    Parameters:
+    - path: str, path to the upstream CSV file
+    - last_date: date-like, last date already ingested (None reads everything)
+
+    Returns:
+    - new_rows: pandas DataFrame
+    """
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+
+        offset = data_start
+        if last_date is not None:
+            offset = _first_row_after(f, data_start, size, header.index('administration_date'), pd.Timestamp(last_date))
+
+        f.seek(offset)
+        dtypes = {name: dtype for name, dtype in DTYPES.items() if name in header}
+        new_rows = pd.read_csv(f, names=header, header=None, dtype=dtypes, parse_dates=['administration_date'])
+
+    if last_date is not None:
+        new_rows = new_rows[new_rows['administration_date'] > pd.Timestamp(last_date)]
+    return new_rows
+
+
+def merge_regional_attributes(rows, regions_path=REGIONS_PATH):
+    """
+    Add pop_resid, gdp_tot and dens_ab from ita_reg_ann_data.csv, and the dailytotal column.
+
+    Parameters:
+    - rows: pandas DataFrame, rows of the upstream file
+    - regions_path: str, path to ita_reg_ann_data.csv
+
+    Returns:
+    - merged_data: pandas DataFrame
+    - unmatched: pandas DataFrame, region code/name pairs missing from ita_reg_ann_data.csv
+    """
+    merged_data, unmatched = join_regional_attributes(rows, load_regional_attributes(regions_path))
+    merged_data['dailytotal'] = merged_data['males'] + merged_data['females']
+    return merged_data, unmatched
+
+
+def compact_complete_months(root, last_date):
+    """
+    Rewrite as one file per region the months that can no longer receive rows.
+
+    The upstream file is sorted by date, so once a day of a later month has
+    been ingested the earlier months are complete. Months already compacted
+    have one file per partition and are left alone.
+
+    Parameters:
+    - root: str, directory of the store
+    - last_date: date-like, last administration date ingested
+
+    Returns:
+    - months: list of str, the months rewritten
+    """
+    current_month = pd.Timestamp(last_date).strftime('%Y-%m')
+    months = sorted(month for month, files in storage.partition_file_counts(root).items()
+                    if month < current_month and files > 1)
+    for month in months:
+        storage.compact_month(root, month)
+    return months
+
+
+def ingest(upstream_path=UPSTREAM_PATH, root=storage.STORE_PATH, regions_path=REGIONS_PATH, compact=True):
+    """
+    Append the days of the upstream file newer than the store and update the stored cube.
+
+    Parameters:
+    - upstream_path: str, path to the upstream CSV file
+    - root: str, directory of the store
+    - regions_path: str, path to ita_reg_ann_data.csv
+    - compact: bool, rewrite the complete months as one file per region, see compact_complete_months
+
+    Returns:
+    - new_rows: int, number of rows appended
+    - unmatched: pandas DataFrame, region code/name pairs of the new rows without attributes
+    """
+    # A compaction interrupted by an earlier run is finished before the store is read
+    if storage.is_store(root):
+        storage.finish_compaction(root)
+
+    last_date = last_ingested_date(root)
+    new_rows = read_new_rows(upstream_path, last_date)
+    if new_rows.empty:
+        return 0, None
+
+    merged_data, unmatched = merge_regional_attributes(new_rows, regions_path)
+    merged_data = merged_data.astype({name: dtype for name, dtype in DTYPES.items() if name in merged_data.columns})
+
+    # The stored cube can only be updated if it matches the store before this append
+    cube_path = os.path.join(root, CUBE_FILE)
+    cube = None
+    if storage.is_store(root) and os.path.exists(cube_path):
+        cube, version = AggregateCube.load(cube_path)
+        if version != storage.store_version(root):
+            cube = None
+
+    # Files are named after the first new date: if the ingest stops before the
+    # state below is saved, the next run reads the same rows and replaces them
+    first_date = merged_data['administration_date'].min()
+    storage.write_dataset(merged_data, root, basename=f"ingest-{first_date:%Y%m%d}-{{i}}.parquet")
+    _save_state(root, merged_data['administration_date'].max())
+
+    # Rewriting a month keeps its rows and the store version, so the cube below is still valid
+    if compact:
+        compact_complete_months(root, merged_data['administration_date'].max())
+
+    # Saved after the state: a cube older than the store is rebuilt by load_cube and the next ingest
+    if cube is not None:
+        cube.add_frame(merged_data)
+    else:
+        cube = AggregateCube.from_frame(read_dataset(root))
+    cube.save(cube_path, version=storage.store_version(root))
+
+    return len(merged_data), unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append the new days of the upstream vaccination file to the Parquet store.')
+    parser.add_argument('upstream_path', nargs='?', default=UPSTREAM_PATH)
+    parser.add_argument('--store', default=storage.STORE_PATH)
+    parser.add_argument('--regions', default=REGIONS_PATH)
+    parser.add_argument('--no-compact', action='store_true', help='keep the daily files of the complete months')
+    args = parser.parse_args()
+
+    appended, unmatched = ingest(args.upstream_path, args.store, args.regions, compact=not args.no_compact)
+    print(f"Appended {appended} rows to {args.store}")
+    if unmatched is not None and not unmatched.empty:
+        print("\nRegions without attributes:")
+        print(unmatched.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
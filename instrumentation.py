@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+
+
+# Instrumentation is off unless this variable is set to 1, or the page is opened with ?profile=1
+ENV_VARIABLE = 'DASHBOARD_PROFILE'
+QUERY_PARAMETER = 'profile'
+
+# Every instrumented run appends one line per phase to this file
+LOG_PATH = os.environ.get('DASHBOARD_PROFILE_LOG', 'dashboard_profile.jsonl')
+
+# Profiler of the script run in progress, each Streamlit session runs in its own context
+_active = ContextVar('profiler', default=None)
+
+# Profilers of all sessions, tracemalloc runs only while there is one
+_profilers = set()
+_lock = threading.Lock()
+
+
+def is_enabled(query_params=None):
+    """
+    Tell whether instrumentation was requested with the environment variable or the query parameter.
+
+    Parameters:
+    - query_params: dict mapping names to lists of values, as read from
+      st.query_params with get_all()
+    """
+    if os.environ.get(ENV_VARIABLE, '').lower() in ('1', 'true', 'yes'):
+        return True
+    values = (query_params or {}).get(QUERY_PARAMETER, [])
+    return any(value.lower() in ('1', 'true', 'yes') for value in values)
+
+
+class Profiler:
+    """
+    Wall time and peak memory of the phases of one dashboard run.
+
+    Memory is measured with tracemalloc, as the peak of the memory allocated
+    during the phase above what was allocated when it started. tracemalloc
+    counts the allocations of the whole process, so the memory numbers are
+    only right when a single session renders at a time.
+    """
+
+    def __init__(self, page=None):
+        self.page = page
+        self.chart_id = None
+        self.records = []
+        self.created = pd.Timestamp.now().isoformat()
+
+    @contextmanager
+    def chart(self, chart_id):
+        """
+        Attribute the phases run inside the block to a chart.
+        """
+        previous, self.chart_id = self.chart_id, chart_id
+        try:
+            yield
+        finally:
+            self.chart_id = previous
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a phase and record the peak memory it allocated.
+        """
+        tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.records.append({'chart': self.chart_id, 'phase': name, 'seconds': seconds,
+                                 'memory_peak_bytes': tracemalloc.get_traced_memory()[1] - memory_start})
+
+    def breakdown(self):
+        """
+        Return the records as a DataFrame with one row per chart and phase.
+        """
+        breakdown = pd.DataFrame(self.records, columns=['chart', 'phase', 'seconds', 'memory_peak_bytes'])
+        breakdown.insert(0, 'page', self.page)
+        return breakdown
+
+    def write_log(self, path=LOG_PATH):
+        """
+        Append the records to a JSON lines file.
+        """
+        with open(path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(dict(record, page=self.page, run=self.created)) + '\n')
+
+
+def activate(enabled, page=None):
+    """
+    Start profiling the current run, or make sure nothing is profiled when disabled.
+
+    Returns:
+    - profiler: the active Profiler, or None
+    """
+    # A run stopped before deactivate() leaves its profiler behind
+    deactivate()
+
+    profiler = Profiler(page) if enabled else None
+    if profiler is not None:
+        with _lock:
+            _profilers.add(profiler)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    _active.set(profiler)
+    return profiler
+
+
+def deactivate():
+    """
+    Stop profiling the current run, and stop tracemalloc once no session is profiled
+    so that the others do not pay for tracing their allocations.
+    """
+    profiler = _active.get()
+    _active.set(None)
+    if profiler is None:
+        return
+
+    with _lock:
+        _profilers.discard(profiler)
+        if not _profilers and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a phase with the active profiler, or do nothing when instrumentation is off.
+
+    The phases of the dashboard are 'load' and 'filter', then 'groupby', 'figure' and
+    'serialization' inside every chart block.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
+
+
+@contextmanager
+def chart(chart_id):
+    """
+    Attribute the phases run inside the block to a chart of the active profiler.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.chart(chart_id):
+        yield
+
+
+def show_breakdown(profiler, container):
+    """
+    Show the time and memory of every phase, then the totals per phase.
+
+    Parameters:
+    - profiler: Profiler
+    - container: Streamlit container, e.g. st.sidebar
+    """
+    breakdown = profiler.breakdown()
+    breakdown['chart'] = breakdown['chart'].fillna('')
+    breakdown['ms'] = (breakdown['seconds'] * 1000).round(1)
+    breakdown['peak MB'] = (breakdown['memory_peak_bytes'] / 1e6).round(2)
+
+    container.subheader('Render profile')
+    container.dataframe(breakdown[['chart', 'phase', 'ms', 'peak MB']])
+
+    totals = breakdown.groupby('phase', sort=False)[['ms', 'peak MB']].agg({'ms': 'sum', 'peak MB': 'max'})
+    container.table(totals)
+    container.caption(f"Logged to {LOG_PATH}")
@@ -634,13 +634,12 @@ ita_reg_ann_data = pd.read_csv('ita_reg_ann_data.csv')
 columns_to_add = ['cod_reg', 'den_reg', 'pop_resid', 'gdp_tot', 'dens_ab']
 data_to_add = ita_reg_ann_data[columns_to_add]
 
-# Merge datasets based on 'cod_reg' and 'den_reg'
-merged_data = pd.merge(italian_vaccination, data_to_add, how='left', left_on=['ISTAT_regional_code', 'region_name'],
-                      right_on=['cod_reg', 'den_reg'])
+# Add the regional attributes by integer region code ('cod_reg'), keeping only rows whose name matches 'den_reg'
+from regions import join_regional_attributes
+merged_data, unmatched_regions = join_regional_attributes(italian_vaccination, data_to_add)
 
-# Drop duplicate columns and unnecessary ones
-columns_to_drop = ['cod_reg', 'den_reg']
-merged_data.drop(columns=columns_to_drop, inplace=True)
+# Region code/name pairs that got no attributes
+print(unmatched_regions)
 
 # Save the merged dataset
 merged_data.to_csv('italian_vaccination_mergedPopGDP.csv', index=False)
@@ -669,6 +668,10 @@ df = pd.read_csv(file_path)
 df['dailytotal'] = df['males'] + df['females']
 df.to_csv('italian_vaccination_mergedPopGDP.csv', index=False)
 
+# Write a columnar copy partitioned by month and region, later cells read only what they need from it
+from storage import STORE_PATH, read_dataset, write_dataset
+write_dataset(df, STORE_PATH, overwrite=True)
+
 # Print the columns
 print("Columns in the dataset:")
 print(df.columns)
@@ -933,7 +936,7 @@ from statsmodels.tsa.stattools import adfuller
 import matplotlib.pyplot as plt
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 
 # Convert 'administration_date' to datetime
 df['administration_date'] = pd.to_datetime(df['administration_date'])
@@ -991,7 +994,7 @@ from statsmodels.tsa.stattools import adfuller
 import matplotlib.pyplot as plt
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 
 # Convert 'administration_date' to datetime
 df['administration_date'] = pd.to_datetime(df['administration_date'])
@@ -1081,7 +1084,7 @@ from statsmodels.tsa.seasonal import seasonal_decompose
 import matplotlib.pyplot as plt
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 
 # Convert 'administration_date' to datetime
 df['administration_date'] = pd.to_datetime(df['administration_date'])
@@ -1151,7 +1154,7 @@ from sklearn.metrics import mean_squared_error
 from math import sqrt
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 
 # Group by dates and sum the 'dailytotal' column
@@ -1168,9 +1171,16 @@ train, test = target_diff[0:train_size], target_diff[train_size:]
 order = (1, 1, 1)  # ARIMA order
 seasonal_order = (0, 1, 1, 7)  # Seasonal order with a 7-day seasonality
 
-# Fit SARIMA model
-sarima_model = SARIMAX(train, order=order, seasonal_order=seasonal_order)
-sarima_fit = sarima_model.fit(disp=False)
+# Fit SARIMA model, or load it from the model registry if this series was already fitted
+from model_registry import ModelRegistry
+registry = ModelRegistry()
+
+def fit_sarima():
+    sarima_model = SARIMAX(train, order=order, seasonal_order=seasonal_order)
+    sarima_fit = sarima_model.fit(disp=False)
+    return sarima_fit, sarima_fit.get_forecast(steps=len(test)).predicted_mean
+
+sarima_fit, _ = registry.get_or_fit(train, 'sarimax', {'order': order, 'seasonal_order': seasonal_order}, fit_sarima)
 
 # Forecasting with SARIMA
 sarima_forecast = sarima_fit.get_forecast(steps=len(test))
@@ -1210,6 +1220,7 @@ plt.show()
 
 import pandas as pd
 from statsmodels.tsa.seasonal import STL
+from forecasting import stl_forecast
 import matplotlib.pyplot as plt
 
 def perform_stl_forecast(time_series, period, forecast_steps):
@@ -1225,36 +1236,11 @@ def perform_stl_forecast(time_series, period, forecast_steps):
     - forecast: pandas Series, the forecasted values
     """
 
-    # Perform STL decomposition
-    stl = STL(time_series, period=period)
-    result = stl.fit()
-
-    # Forecast using the seasonal component
-    seasonal_forecast = result.trend + result.resid
-
-    # Make forecasts into the future
-    forecast_index = pd.date_range(time_series.index[-1], periods=forecast_steps + 1, freq='D')[1:]
-    forecast = pd.Series(index=forecast_index)
-
-    for i in range(forecast_steps):
-        # Extend the time series with the seasonal component
-        extended_series = pd.concat([time_series, seasonal_forecast])
-
-        # Perform STL decomposition on the extended series
-        stl_extended = STL(extended_series, period=period)
-        result_extended = stl_extended.fit()
-
-        # Extract the forecasted value
-        forecast[i] = result_extended.trend.iloc[-1] + result_extended.resid.iloc[-1]
-
-        # Update the time series for the next iteration
-        time_series = time_series.append(pd.Series(forecast[i], index=[forecast_index[i]]))
-        seasonal_forecast = result_extended.trend + result_extended.resid
-
-    return forecast
+    # Decompose once and project the trend and seasonal components over the whole horizon
+    return stl_forecast(time_series, period, forecast_steps)
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 df.set_index('administration_date', inplace=True)
 
@@ -1266,7 +1252,9 @@ seasonal_period = 7  # adjust based on your data
 forecast_steps = 30  # number of days to forecast into the future
 
 # Perform STL forecast
-forecast_result = perform_stl_forecast(your_time_series, seasonal_period, forecast_steps)
+from model_registry import ModelRegistry
+_, forecast_result = ModelRegistry().get_or_fit(your_time_series, 'stl', {'period': seasonal_period, 'forecast_steps': forecast_steps},
+                                                lambda: (None, perform_stl_forecast(your_time_series, seasonal_period, forecast_steps)))
 
 # Plot the results
 plt.figure(figsize=(12, 6))
@@ -1281,6 +1269,7 @@ plt.show()
 import warnings
 import pandas as pd
 from statsmodels.tsa.seasonal import STL
+from forecasting import stl_forecast
 import matplotlib.pyplot as plt
 import numpy as np
 from sklearn.metrics import mean_squared_error, accuracy_score
@@ -1300,36 +1289,11 @@ def perform_stl_forecast(time_series, period, forecast_steps):
     - forecast: pandas Series, the forecasted values
     """
 
-    # Perform STL decomposition
-    stl = STL(time_series, period=period)
-    result = stl.fit()
-
-    # Forecast using the seasonal component
-    seasonal_forecast = result.trend + result.resid
-
-    # Make forecasts into the future
-    forecast_index = pd.date_range(time_series.index[-1], periods=forecast_steps + 1, freq='D')[1:]
-    forecast = pd.Series(index=forecast_index)
-
-    for i in range(forecast_steps):
-        # Extend the time series with the seasonal component
-        extended_series = pd.concat([time_series, seasonal_forecast])
-
-        # Perform STL decomposition on the extended series
-        stl_extended = STL(extended_series, period=period)
-        result_extended = stl_extended.fit()
-
-        # Extract the forecasted value
-        forecast[i] = result_extended.trend.iloc[-1] + result_extended.resid.iloc[-1]
-
-        # Update the time series for the next iteration
-        time_series = time_series.append(pd.Series(forecast[i], index=[forecast_index[i]]))
-        seasonal_forecast = result_extended.trend + result_extended.resid
-
-    return forecast
+    # Decompose once and project the trend and seasonal components over the whole horizon
+    return stl_forecast(time_series, period, forecast_steps)
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 df.set_index('administration_date', inplace=True)
 
@@ -1341,7 +1305,9 @@ seasonal_period = 7  # adjust based on your data
 forecast_steps = 90  # number of days to forecast into the future
 
 # Perform STL forecast
-forecast_result = perform_stl_forecast(your_time_series, seasonal_period, forecast_steps)
+from model_registry import ModelRegistry
+_, forecast_result = ModelRegistry().get_or_fit(your_time_series, 'stl', {'period': seasonal_period, 'forecast_steps': forecast_steps},
+                                                lambda: (None, perform_stl_forecast(your_time_series, seasonal_period, forecast_steps)))
 
 # Calculate RMSE
 rmse = np.sqrt(mean_squared_error(your_time_series[-forecast_steps:], forecast_result))
@@ -1378,7 +1344,7 @@ from sklearn.preprocessing import MinMaxScaler
 import matplotlib.pyplot as plt
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 df.set_index('administration_date', inplace=True)
 
@@ -1419,34 +1385,17 @@ plt.show()
 
 import pandas as pd
 from statsmodels.tsa.seasonal import STL
+from forecasting import stl_forecast
 from sklearn.preprocessing import MinMaxScaler
 import numpy as np
 import matplotlib.pyplot as plt
 
 def perform_stl_forecast(time_series, period, forecast_steps):
-    stl = STL(time_series, period=period)
-    result = stl.fit()
-
-    seasonal_forecast = result.trend + result.resid
-
-    forecast_index = pd.date_range(time_series.index[-1], periods=forecast_steps + 1, freq='M')[1:]
-    forecast = pd.Series(index=forecast_index)
-
-    for i in range(forecast_steps):
-        extended_series = pd.concat([time_series, seasonal_forecast])
-
-        stl_extended = STL(extended_series, period=period)
-        result_extended = stl_extended.fit()
-
-        forecast[i] = result_extended.trend.iloc[-1] + result_extended.resid.iloc[-1]
-
-        time_series = time_series.append(pd.Series(forecast[i], index=[forecast_index[i]]))
-        seasonal_forecast = result_extended.trend + result_extended.resid
-
-    return forecast
+    # Decompose once and project the trend and seasonal components over the whole horizon
+    return stl_forecast(time_series, period, forecast_steps, freq='M')
 
 # Load the dataset
-df = pd.read_csv('/content/italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 df.set_index('administration_date', inplace=True)
 
@@ -1468,7 +1417,9 @@ forecast_steps = 12  # number of months to forecast into the future
 scaled_series = pd.Series(scaled_data.flatten(), index=your_time_series.index)
 
 # Perform STL forecast
-forecast_result = perform_stl_forecast(scaled_series, seasonal_period, forecast_steps)
+from model_registry import ModelRegistry
+_, forecast_result = ModelRegistry().get_or_fit(scaled_series, 'stl', {'period': seasonal_period, 'forecast_steps': forecast_steps, 'freq': 'M'},
+                                                lambda: (None, perform_stl_forecast(scaled_series, seasonal_period, forecast_steps)))
 
 # Inverse transform the forecasted data to the original scale
 forecast_result_original_scale = scaler.inverse_transform(forecast_result.values.reshape(-1, 1))
@@ -1515,12 +1466,12 @@ from keras.layers import LSTM, Dense, Dropout
 import matplotlib.pyplot as plt
 
 # Function to prepare data for LSTM
+from windowing import batch_generator, make_windows, steps_per_epoch
+
 def prepare_lstm_data(data, time_steps):
-    X, y = [], []
-    for i in range(len(data) - time_steps):
-        X.append(data[i:(i + time_steps), 0])
-        y.append(data[i + time_steps, 0])
-    return np.array(X), np.array(y)
+    # Windows are strided views of the data, nothing is copied
+    X, y = make_windows(data, time_steps)
+    return X[..., 0], y
 
 # Hyperparameters
 time_steps = 30  # Adjust based on your data
@@ -1529,7 +1480,7 @@ batch_size = 32
 forecast_steps = 30
 
 # Load the dataset
-df = pd.read_csv('italian_vaccination_mergedPopGDP.csv')
+df = read_dataset(STORE_PATH, columns=['administration_date', 'dailytotal'])
 df['administration_date'] = pd.to_datetime(df['administration_date'])
 df.set_index('administration_date', inplace=True)
 your_time_series = df['dailytotal']
@@ -1545,19 +1496,28 @@ X, y = prepare_lstm_data(scaled_data, time_steps)
 X = np.reshape(X, (X.shape[0], time_steps, 1))
 
 # Build the LSTM model with regularization
-model = Sequential()
-model.add(LSTM(50, input_shape=(time_steps, 1), return_sequences=True))
-model.add(Dropout(0.2))  # Dropout layer for regularization
-model.add(LSTM(50))
-model.add(Dropout(0.2))  # Dropout layer for regularization
-model.add(Dense(1))
-model.compile(optimizer='adam', loss='mean_squared_error')
-
-# Train the model
-model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=2)
-
-# Make predictions on the training set
-train_predict = model.predict(X)
+def fit_lstm():
+    model = Sequential()
+    model.add(LSTM(50, input_shape=(time_steps, 1), return_sequences=True))
+    model.add(Dropout(0.2))  # Dropout layer for regularization
+    model.add(LSTM(50))
+    model.add(Dropout(0.2))  # Dropout layer for regularization
+    model.add(Dense(1))
+    model.compile(optimizer='adam', loss='mean_squared_error')
+
+    # Train the model, visiting the windows in a new random order every epoch like model.fit(X, y) does
+    model.fit(batch_generator(X, y, batch_size, shuffle=True, seed=0), steps_per_epoch=steps_per_epoch(len(X), batch_size),
+              epochs=epochs, verbose=2)
+    return model, None
+
+# Load the trained model from the registry, training it only if the series or the hyperparameters changed
+from model_registry import ModelRegistry
+model, _ = ModelRegistry().get_or_fit(your_time_series, 'lstm', {'time_steps': time_steps, 'epochs': epochs, 'batch_size': batch_size}, fit_lstm)
+
+# Make predictions on the training set once, the RMSE computations below reuse them
+from lstm_inference import CachedPredictor, recursive_forecast
+predictor = CachedPredictor(model)
+train_predict = predictor.predict(X)
 
 # Inverse transform the training predictions
 train_predict_original_scale = scaler.inverse_transform(train_predict).flatten()
@@ -1571,18 +1531,14 @@ if len(your_time_series) > 2 * forecast_steps:
     # Make predictions for the next 30 days
     forecast_input = scaled_data[-time_steps:].reshape(1, -1, 1)
 
-    forecast_result = []
-    for i in range(forecast_steps):
-        forecast_value = model.predict(forecast_input)
-        forecast_result.append(max(0, forecast_value[0, 0]))  # Set negative predictions to zero
-        forecast_input = np.roll(forecast_input, shift=-1, axis=1)
-        forecast_input[0, -1, 0] = forecast_result[-1]
+    # One model call per step, negative predictions are set to zero
+    forecast_result = recursive_forecast(model, forecast_input, forecast_steps)[0]
 
     # Inverse transform the forecasted values
     forecast_result_original_scale = scaler.inverse_transform(np.array(forecast_result).reshape(-1, 1)).reshape(-1)
 
     # Evaluate the model on the training set
-    rmse_train = np.sqrt(mean_squared_error(y, model.predict(X)))
+    rmse_train = np.sqrt(mean_squared_error(y, predictor.predict(X)))
     print(f"Training RMSE: {rmse_train}")
 
     # Test the model on a test set if available
@@ -1590,8 +1546,8 @@ if len(your_time_series) > 2 * forecast_steps:
         # Split the data into training and test sets
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
-        # Evaluate the model on the test set
-        rmse_test = np.sqrt(mean_squared_error(y_test, model.predict(X_test)))
+        # Evaluate the model on the test set, the last rows of the cached predictions
+        rmse_test = np.sqrt(mean_squared_error(y_test, predictor.predict(X)[len(X_train):]))
         print(f"Test RMSE: {rmse_test}")
     else:
         print("Not enough data for testing.")
@@ -1638,4 +1594,25 @@ plt.show()
 Overall, the results suggest that the LSTM model is performing well on both the training and test sets.
 """
 
+# Forecast every region with the same model: each regional series is scaled on its own,
+# then the last windows of all regions are forecast together, one model call per step for all of them
+from aggregates import split_series
+from cube import load_cube
+from lstm_inference import last_windows
+
+region_series = split_series(load_cube(STORE_PATH), by=['region_name'])
+region_scalers = {key: MinMaxScaler(feature_range=(0, 1)).fit(values.to_numpy().reshape(-1, 1)) for key, values in region_series.items()}
+region_windows = last_windows([region_scalers[key].transform(values.to_numpy().reshape(-1, 1)) for key, values in region_series.items()], time_steps)
+region_forecast = recursive_forecast(model, region_windows, forecast_steps)
+
+# Back to each region's scale, one column per region
+last_date = next(iter(region_series.values())).index[-1]
+region_forecast = pd.DataFrame({key[0]: region_scalers[key].inverse_transform(values.reshape(-1, 1)).reshape(-1)
+                                for key, values in zip(region_series, region_forecast)},
+                               index=pd.date_range(last_date, periods=forecast_steps + 1, freq='D')[1:])
+
+fig = px.line(region_forecast, labels={'index': 'Date', 'value': 'Forecasted Daily Total', 'variable': 'Region'},
+              title=f'LSTM {forecast_steps}-Day Forecast by Region')
+fig.show()
+
 df.tail()
\ No newline at end of file
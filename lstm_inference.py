@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def last_windows(series, time_steps):
+    """
+    Stack the last `time_steps` values of several series into one model input.
+
+    Parameters:
+    - series: list of 1-D arrays (e.g. the scaled daily totals of each region)
+    - time_steps: int, length of the model input windows
+
+    Returns:
+    - windows: numpy array of shape (n_series, time_steps, 1)
+    """
+    return np.stack([np.asarray(values, dtype=np.float32).reshape(-1)[-time_steps:] for values in series])[..., np.newaxis]
+
+
+def recursive_forecast(model, windows, steps, min_value=0.0):
+    """
+    Forecast many series recursively with one model call per step for all of them.
+
+    Each prediction is appended to its window, which drops its oldest value,
+    and the updated windows are fed back to the model for the next step.
+
+    Parameters:
+    - model: Keras model taking (batch, time_steps, 1) and returning (batch, 1)
+    - windows: numpy array of shape (n_series, time_steps, 1), e.g. from last_windows
+    - steps: int, number of steps to forecast
+    - min_value: float, predictions are clipped below this value (None to disable)
+
+    Returns:
+    - forecast: numpy array of shape (n_series, steps)
+    """
+    windows = np.array(windows, dtype=np.float32)
+    forecast = np.empty((len(windows), steps), dtype=np.float32)
+
+    for step in range(steps):
+        # predict_on_batch skips the dataset and callback setup done by predict()
+        predictions = np.asarray(model.predict_on_batch(windows)).reshape(len(windows))
+        if min_value is not None:
+            predictions = np.maximum(predictions, min_value)
+        forecast[:, step] = predictions
+
+        windows[:, :-1] = windows[:, 1:]
+        windows[:, -1, 0] = predictions
+
+    return forecast
+
+
+class CachedPredictor:
+    """
+    Wrap a Keras model so that repeated predictions on the same array are computed once.
+
+    Arrays are identified by their memory address, shape and strides, so they
+    must not be modified in place between calls.
+    """
+
+    def __init__(self, model, batch_size=1024):
+        self.model = model
+        self.batch_size = batch_size
+        self._cache = {}
+
+    def predict(self, X):
+        """
+        Return model.predict(X), reusing the result of an earlier call on the same array.
+        """
+        X = np.asarray(X)
+        key = (X.__array_interface__['data'][0], X.shape, X.strides, X.dtype.str)
+        if key not in self._cache:
+            # The array is kept alive so that its address cannot be reused by another one
+            self._cache[key] = (X, self.model.predict(X, batch_size=self.batch_size, verbose=0))
+        return self._cache[key][1]
+
+    def clear(self):
+        self._cache.clear()
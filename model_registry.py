@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+# Default directory of the registry
+REGISTRY_PATH = 'model_registry'
+
+KERAS_MODEL_FILE = 'model.keras'
+PICKLE_MODEL_FILE = 'model.pkl'
+FORECAST_FILE = 'forecast.pkl'
+META_FILE = 'meta.json'
+
+
+def fingerprint(values, model_type, params):
+    """
+    Hash the input data, the model type and its hyperparameters.
+
+    Parameters:
+    - values: pandas Series, DataFrame or numpy array the model is fitted on
+    - model_type: str, e.g. 'sarimax', 'stl' or 'lstm'
+    - params: dict, hyperparameters (order, seasonal_order, time_steps, epochs, ...)
+
+    Returns:
+    - key: str, hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(model_type.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        digest.update(pd.util.hash_pandas_object(values, index=True).to_numpy().tobytes())
+    else:
+        values = np.ascontiguousarray(values)
+        digest.update(str((values.dtype, values.shape)).encode())
+        digest.update(values.tobytes())
+
+    return digest.hexdigest()
+
+
+def _is_keras_model(model):
+    return type(model).__module__.split('.')[0] in ('keras', 'tensorflow', 'tf_keras')
+
+
+class ModelRegistry:
+    """
+    Fitted models and their forecasts saved on disk, keyed by fingerprint().
+
+    Keras models are saved in the native .keras format, every other model
+    (statsmodels results, STL results, ...) is pickled.
+    """
+
+    def __init__(self, root=REGISTRY_PATH):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, values, model_type, params):
+        """
+        Return the (model, forecast) saved for these inputs, or None.
+        """
+        path = self._path(fingerprint(values, model_type, params))
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            return None
+
+        if os.path.exists(os.path.join(path, KERAS_MODEL_FILE)):
+            from keras.models import load_model
+            model = load_model(os.path.join(path, KERAS_MODEL_FILE))
+        else:
+            with open(os.path.join(path, PICKLE_MODEL_FILE), 'rb') as f:
+                model = pickle.load(f)
+
+        with open(os.path.join(path, FORECAST_FILE), 'rb') as f:
+            forecast = pickle.load(f)
+
+        return model, forecast
+
+    def put(self, values, model_type, params, model, forecast=None):
+        """
+        Save a fitted model and its forecast for these inputs.
+        """
+        path = self._path(fingerprint(values, model_type, params))
+        os.makedirs(path, exist_ok=True)
+
+        if _is_keras_model(model):
+            model.save(os.path.join(path, KERAS_MODEL_FILE))
+        else:
+            with open(os.path.join(path, PICKLE_MODEL_FILE), 'wb') as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with open(os.path.join(path, FORECAST_FILE), 'wb') as f:
+            pickle.dump(forecast, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Written last, an entry without it is incomplete and ignored
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump({'model_type': model_type, 'params': params}, f, default=str)
+
+    def get_or_fit(self, values, model_type, params, fit):
+        """
+        Load the model for these inputs, or fit and save it if the registry has none.
+
+        Parameters:
+        - values: data the model is fitted on, used for the key
+        - model_type: str, model name used for the key
+        - params: dict, hyperparameters used for the key
+        - fit: callable without arguments returning (model, forecast)
+
+        Returns:
+        - model: the fitted model
+        - forecast: the forecast saved with it
+        """
+        entry = self.get(values, model_type, params)
+        if entry is not None:
+            return entry
+
+        model, forecast = fit()
+        self.put(values, model_type, params, model, forecast)
+        return model, forecast
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+
+# Thread pools of the BLAS libraries, limited so that workers do not oversubscribe the cores
+BLAS_THREAD_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                         'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+
+def available_cores():
+    """
+    Return the number of cores this process may run on.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@contextmanager
+def process_pool(workers=None, blas_threads=1):
+    """
+    Open a pool of spawned worker processes with limited BLAS thread pools.
+
+    Parameters:
+    - workers: int, number of processes (all available cores if None)
+    - blas_threads: int, threads allowed to the BLAS libraries in each worker
+
+    Yields:
+    - pool: concurrent.futures.ProcessPoolExecutor
+    """
+    # Workers are spawned, so they read these limits before loading NumPy
+    saved_environ = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    os.environ.update({name: str(blas_threads) for name in BLAS_THREAD_VARIABLES})
+    try:
+        with ProcessPoolExecutor(max_workers=workers or available_cores(),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            yield pool
+    finally:
+        for name, value in saved_environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Maximum number of points sent to the browser for each trace
+MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 1000))
+
+# Figures with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = int(os.environ.get('CHART_WEBGL_THRESHOLD', 5000))
+
+
+def _as_float(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.to_numpy(dtype=np.float64)
+
+
+def lttb(x, y, n_out=MAX_POINTS):
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are split
+    into n_out - 2 buckets, and from each bucket the point forming the largest
+    triangle with the previously kept point and the average of the next bucket
+    is kept, which preserves peaks and troughs of the series.
+
+    Parameters:
+    - x: array-like, sorted x values (numbers or dates)
+    - y: array-like, y values
+    - n_out: int, number of points to keep
+
+    Returns:
+    - indices: numpy array of the positions of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def downsample(frame, x, y, n_out=MAX_POINTS, by=None):
+    """
+    Downsample a long-format frame so each line has at most n_out points.
+
+    Parameters:
+    - frame: pandas DataFrame sorted by x
+    - x: str, column on the x axis
+    - y: str, column on the y axis
+    - n_out: int, maximum number of points per line
+    - by: str, optional column splitting the frame into lines (e.g. the px color column)
+
+    Returns:
+    - frame: pandas DataFrame with the kept rows
+    """
+    if by is None:
+        return frame.iloc[lttb(frame[x], frame[y], n_out)]
+
+    positions = []
+    for rows in frame.groupby(by, observed=True, sort=False).indices.values():
+        positions.append(rows[lttb(frame[x].iloc[rows], frame[y].iloc[rows], n_out)])
+    return frame.iloc[np.sort(np.concatenate(positions))] if positions else frame
+
+
+def date_window(frame, start, end, column='administration_date'):
+    """
+    Keep the rows of a date-sorted frame between start and end (inclusive).
+    """
+    dates = frame[column]
+    lower = dates.searchsorted(pd.Timestamp(start), side='left')
+    upper = dates.searchsorted(pd.Timestamp(end), side='right')
+    return frame.iloc[lower:upper]
+
+
+def render_mode(n_points, threshold=WEBGL_THRESHOLD):
+    """
+    Return the px.line / px.scatter render_mode for a figure with n_points points.
+
+    SVG is kept for small views, WebGL is used above the threshold.
+    """
+    return 'webgl' if n_points > threshold else 'svg'
+
+
+def scatter_trace(n_points, threshold=WEBGL_THRESHOLD):
+    """
+    Return the trace class for a figure with n_points points: go.Scattergl above
+    the threshold, go.Scatter otherwise.
+    """
+    return go.Scattergl if n_points > threshold else go.Scatter
@@ -0,0 +1,151 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# Rows parsed at a time, peak memory depends on this and not on the file size
+CHUNK_SIZE = 500_000
+
+# Number of smallest hashes kept per column for the distinct-count estimate
+SKETCH_SIZE = 1024
+
+# Columns with more distinct values than this stop being counted per category
+MAX_CATEGORIES = 1000
+
+
+class StreamingProfile:
+    """
+    Data-quality profile of a table computed one chunk at a time.
+
+    Null counts, negative counts, min/max and per-category counts are exact.
+    Distinct counts are exact up to SKETCH_SIZE values and estimated above with
+    a k-minimum-values sketch, so memory stays bounded for every column.
+    """
+
+    def __init__(self, sketch_size=SKETCH_SIZE, max_categories=MAX_CATEGORIES):
+        self.sketch_size = sketch_size
+        self.max_categories = max_categories
+        self.rows = 0
+        self.nulls = {}
+        self.negatives = {}
+        self.minimum = {}
+        self.maximum = {}
+        self.sketches = {}
+        self.categories = {}
+        self.pending_nulls = {}
+
+    def update(self, chunk):
+        """
+        Add a chunk of rows to the profile.
+
+        Parameters:
+        - chunk: pandas DataFrame
+        """
+        self.rows += len(chunk)
+
+        for column in chunk.columns:
+            values = chunk[column]
+            nulls = int(values.isnull().sum())
+            self.nulls[column] = self.nulls.get(column, 0) + nulls
+
+            # The type of a column is fixed by the first chunk with values in it: a chunk
+            # of nulls parses as float, so its nulls wait until the column turns out to be text
+            is_text = column in self.categories
+            if not is_text and column not in self.negatives:
+                if nulls == len(values):
+                    self.pending_nulls[column] = self.pending_nulls.get(column, 0) + nulls
+                    continue
+                is_text = not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)
+
+            if not is_text:
+                self.negatives[column] = self.negatives.get(column, 0) + int((values < 0).sum())
+                if values.notna().any():
+                    self.minimum[column] = min(self.minimum.get(column, np.inf), values.min())
+                    self.maximum[column] = max(self.maximum.get(column, -np.inf), values.max())
+            elif column not in self.categories or self.categories[column] is not None:
+                counts = values.value_counts(dropna=False)
+                if column in self.categories:
+                    counts = self.categories[column].add(counts, fill_value=0)
+                elif column in self.pending_nulls:
+                    counts = counts.add(pd.Series({np.nan: self.pending_nulls.pop(column)}), fill_value=0)
+                # Too many categories: the column is treated as free text
+                self.categories[column] = counts if len(counts) <= self.max_categories else None
+
+            self._update_sketch(column, values.dropna())
+
+    def _update_sketch(self, column, values):
+        hashes = np.unique(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        if column in self.sketches:
+            hashes = np.union1d(self.sketches[column], hashes)
+        self.sketches[column] = hashes[:self.sketch_size]
+
+    def distinct(self, column):
+        """
+        Return the exact number of distinct values, or its estimate above the sketch size.
+        """
+        hashes = self.sketches.get(column, np.empty(0, dtype=np.uint64))
+        if len(hashes) < self.sketch_size:
+            return len(hashes)
+        return int(round((self.sketch_size - 1) / (float(hashes[-1]) / 2.0 ** 64)))
+
+    def summary(self):
+        """
+        Return one row per column with nulls, negatives, min, max and distinct values.
+        """
+        columns = list(self.nulls)
+        return pd.DataFrame({
+            'nulls': [self.nulls[column] for column in columns],
+            'negatives': [self.negatives.get(column) for column in columns],
+            'min': [self.minimum.get(column) for column in columns],
+            'max': [self.maximum.get(column) for column in columns],
+            'distinct': [self.distinct(column) for column in columns],
+        }, index=columns)
+
+    def category_counts(self, column):
+        """
+        Return the value counts of a text column, or None if it has too many categories.
+        """
+        counts = self.categories.get(column)
+        return None if counts is None else counts.astype(np.int64).sort_values(ascending=False)
+
+
+def profile_csv(path, chunksize=CHUNK_SIZE, **kwargs):
+    """
+    Profile a CSV file in a single chunked pass.
+
+    Parameters:
+    - path: str, path to the CSV file
+    - chunksize: int, rows parsed at a time
+    - kwargs: passed to StreamingProfile
+
+    Returns:
+    - profile: StreamingProfile
+    """
+    profile = StreamingProfile(**kwargs)
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        profile.update(chunk)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile the vaccination CSV in one bounded-memory pass.')
+    parser.add_argument('csv_path', nargs='?', default='italian_vaccination.csv')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    profile = profile_csv(args.csv_path, chunksize=args.chunksize)
+
+    print(f"Rows: {profile.rows}")
+    print("\nColumn summary:")
+    print(profile.summary())
+
+    for column in profile.categories:
+        counts = profile.category_counts(column)
+        if counts is not None:
+            print(f"\n{column} value counts:")
+            print(counts)
+
+
+if __name__ == '__main__':
+    main()
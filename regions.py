@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+# Regional attributes file and the columns added to the vaccination rows
+REGIONS_PATH = 'ita_reg_ann_data.csv'
+ATTRIBUTE_COLUMNS = ['pop_resid', 'gdp_tot', 'dens_ab']
+
+
+def load_regional_attributes(path=REGIONS_PATH):
+    """
+    Load ita_reg_ann_data.csv, one row per region keyed by 'cod_reg'.
+    """
+    return pd.read_csv(path, usecols=['cod_reg', 'den_reg'] + ATTRIBUTE_COLUMNS)
+
+
+def join_regional_attributes(rows, attributes, match_names=True):
+    """
+    Add the regional attributes to the vaccination rows by integer region code.
+
+    Each attribute is stored in a dense array indexed by 'cod_reg', so every
+    row is enriched with one array lookup. The region names are factorized
+    once (a categorical column reuses its codes), then compared with 'den_reg'
+    only for the distinct (code, name) pairs. The other columns of `rows` are
+    shared with the result, not copied.
+
+    Parameters:
+    - rows: pandas DataFrame with 'ISTAT_regional_code' and 'region_name'
+    - attributes: pandas DataFrame from load_regional_attributes
+    - match_names: bool, also require 'region_name' to equal 'den_reg', which
+      gives the same result as merging on both columns
+
+    Returns:
+    - joined: pandas DataFrame, rows with the attribute columns added
+    - unmatched: pandas DataFrame with the (code, name) pairs that got no attributes
+      and how many rows they cover
+    """
+    codes = rows['ISTAT_regional_code'].to_numpy(dtype=np.int64)
+    names = rows['region_name']
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        name_codes, categories = names.cat.codes.to_numpy(dtype=np.int64), names.cat.categories
+    else:
+        name_codes, categories = pd.factorize(names)
+
+    # Dense lookup arrays indexed by region code
+    size = int(max(codes.max(initial=0), attributes['cod_reg'].max())) + 1
+    lookup_names = np.full(size, None, dtype=object)
+    lookup_names[attributes['cod_reg'].to_numpy()] = attributes['den_reg'].to_numpy()
+
+    # Validate each distinct (code, name) pair once
+    valid_code = (codes >= 0) & (codes < size)
+    pairs = np.where(valid_code, codes, 0) * (len(categories) + 1) + (name_codes + 1)
+    pair_rows = np.bincount(pairs[valid_code], minlength=size * (len(categories) + 1))
+    pair_matched = np.zeros(len(pair_rows), dtype=bool)
+    unmatched = []
+    for pair in np.flatnonzero(pair_rows):
+        code, name_code = divmod(int(pair), len(categories) + 1)
+        name = categories[name_code - 1] if name_code > 0 else None
+        if match_names:
+            pair_matched[pair] = name is not None and lookup_names[code] == name
+        else:
+            pair_matched[pair] = lookup_names[code] is not None
+        if not pair_matched[pair]:
+            unmatched.append((code, name, lookup_names[code], int(pair_rows[pair])))
+
+    # Codes outside the lookup table
+    for code in np.unique(codes[~valid_code]):
+        unmatched.append((int(code), None, None, int((codes == code).sum())))
+
+    matched = valid_code & pair_matched[pairs]
+
+    # Shallow copy: only the attribute columns are new
+    joined = rows.copy(deep=False)
+    for column in ATTRIBUTE_COLUMNS:
+        lookup = np.full(size, np.nan)
+        lookup[attributes['cod_reg'].to_numpy()] = attributes[column].to_numpy(dtype=np.float64)
+        joined[column] = np.where(matched, lookup[np.where(valid_code, codes, 0)], np.nan)
+
+    unmatched = pd.DataFrame(unmatched, columns=['ISTAT_regional_code', 'region_name', 'den_reg', 'rows'])
+
+    return joined, unmatched
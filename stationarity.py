@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tools.sm_exceptions import InterpolationWarning
+from statsmodels.tsa.stattools import adfuller, kpss
+
+from aggregates import split_series
+from cube import DOSE_COLUMNS, load_cube
+from model_registry import fingerprint
+from parallel import process_pool
+
+
+# Results of previous runs, keyed by the fingerprint of the tested series
+CACHE_PATH = 'stationarity_cache.json'
+
+# Significance level used for the stationarity verdict
+ALPHA = 0.05
+
+# Series the notebook tests: the levels and their first difference
+TRANSFORMS = ['level', 'diff']
+
+
+def collect_series(cube):
+    """
+    Build the daily series to screen: national dailytotal, each region, each supplier and each dose type.
+
+    Parameters:
+    - cube: AggregateCube
+
+    Returns:
+    - series: dict mapping (group, name) to a daily pandas Series
+    """
+    series = {}
+    for group in ['region_name', 'supplier']:
+        for (name,), values in split_series(cube, by=[group]).items():
+            series[(group, name)] = values
+
+    doses = cube.sum(by=['administration_date'], measures=['dailytotal'] + DOSE_COLUMNS).set_index('administration_date')
+    doses = doses.asfreq('D', fill_value=0).astype(np.float64)
+    series[('national', 'dailytotal')] = doses['dailytotal']
+    for column in DOSE_COLUMNS:
+        series[('dose', column)] = doses[column]
+
+    return series
+
+
+def test_series(values):
+    """
+    Run the ADF and KPSS tests on one series.
+
+    Parameters:
+    - values: numpy array
+
+    Returns:
+    - result: dict with the statistics, p-values and the stationarity verdict
+      (ADF rejects a unit root and KPSS does not reject stationarity)
+    """
+    result = {'n': len(values), 'adf_stat': np.nan, 'adf_pvalue': np.nan, 'kpss_stat': np.nan, 'kpss_pvalue': np.nan, 'error': None}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', InterpolationWarning)
+            adf = adfuller(values, autolag='AIC')
+            kpss_result = kpss(values, regression='c', nlags='auto')
+        result.update(adf_stat=float(adf[0]), adf_pvalue=float(adf[1]),
+                      kpss_stat=float(kpss_result[0]), kpss_pvalue=float(kpss_result[1]))
+    except Exception as error:
+        result['error'] = str(error)
+
+    result['stationary'] = bool(result['adf_pvalue'] <= ALPHA and result['kpss_pvalue'] > ALPHA)
+    return result
+
+
+def _load_cache(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_cache(path, cache):
+    with open(path, 'w') as f:
+        json.dump(cache, f)
+
+
+def screen(series, transforms=TRANSFORMS, workers=None, cache_path=CACHE_PATH):
+    """
+    Test every series in parallel worker processes, reusing cached results for unchanged series.
+
+    Parameters:
+    - series: dict from collect_series
+    - transforms: list of str, 'level' and/or 'diff'
+    - workers: int, number of processes (all available cores if None)
+    - cache_path: str, JSON file with the results of earlier runs (None disables the cache)
+
+    Returns:
+    - results: pandas DataFrame with one row per series and transform
+    """
+    cache = _load_cache(cache_path)
+
+    tasks = []
+    for (group, name), values in series.items():
+        for transform in transforms:
+            tested = values.diff().dropna() if transform == 'diff' else values
+            key = fingerprint(tested, 'adf_kpss', {'alpha': ALPHA})
+            tasks.append((group, name, transform, key, tested.to_numpy()))
+
+    missing = [task for task in tasks if task[3] not in cache]
+    if missing:
+        with process_pool(workers) as pool:
+            for task, result in zip(missing, pool.map(test_series, [task[4] for task in missing])):
+                cache[task[3]] = result
+        if cache_path:
+            _save_cache(cache_path, cache)
+
+    rows = [dict(group=group, series=name, transform=transform, **cache[key]) for group, name, transform, key, _ in tasks]
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run ADF and KPSS on every region, supplier and dose-type series.')
+    parser.add_argument('--data', default=None, help='CSV file or Parquet store (default: the dashboard dataset)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--output', default='stationarity.csv')
+    args = parser.parse_args()
+
+    results = screen(collect_series(load_cube(args.data)), workers=args.workers, cache_path=args.cache)
+    results.to_csv(args.output, index=False)
+    print(results.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
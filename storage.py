@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+
+# Default location of the columnar copy of the merged dataset
+STORE_PATH = 'vaccination_store'
+
+# Hive-style partition keys: one directory per month, then one per region
+MONTH_COLUMN = 'administration_month'
+PARTITION_COLUMNS = [MONTH_COLUMN, 'region_name']
+
+COMPRESSION = 'zstd'
+
+# Small JSON file rewritten by every write_dataset with a new version of the store
+VERSION_FILE = '_version.json'
+
+# Small JSON file kept inside the store while compact_month swaps a rewritten month in
+COMPACT_FILE = '_compact_state.json'
+
+
+def is_store(path):
+    """
+    Tell whether a path points to a Parquet store rather than a CSV file.
+    """
+    return os.path.isdir(path)
+
+
+def store_files(root):
+    """
+    List the Parquet files of a store.
+
+    Parameters:
+    - root: str, directory of the store
+
+    Returns:
+    - files: list of str, sorted file paths
+    """
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith('.parquet'):
+                files.append(os.path.join(dirpath, filename))
+    return sorted(files)
+
+
+def store_version(root):
+    """
+    Return a cheap fingerprint of a store.
+
+    Stores written by write_dataset keep it in VERSION_FILE, so it costs one
+    small read however many files the store has. Other stores fall back to
+    listing them: number of files, total size and newest mtime.
+    """
+    version_path = os.path.join(root, VERSION_FILE)
+    if os.path.exists(version_path):
+        with open(version_path) as f:
+            return tuple(json.load(f)['version'])
+
+    files = store_files(root)
+    stats = [os.stat(path) for path in files]
+    return (len(files), sum(s.st_size for s in stats), max((s.st_mtime_ns for s in stats), default=0))
+
+
+def _write_version(root):
+    # A new generation number and the time of the write, replaced atomically
+    # after the data files so readers never see the new version before them
+    version_path = os.path.join(root, VERSION_FILE)
+    generation = 1
+    if os.path.exists(version_path):
+        generation = store_version(root)[0] + 1
+
+    with open(version_path + '.tmp', 'w') as f:
+        json.dump({'version': [generation, time.time_ns()]}, f)
+    os.replace(version_path + '.tmp', version_path)
+
+
+def write_dataset(data, root=STORE_PATH, overwrite=False, basename=None):
+    """
+    Write the merged dataset as compressed Parquet partitioned by month and region.
+
+    New files are added next to the existing ones, so the function can also be
+    used to append rows to a store. Every write gives the store a new store_version.
+
+    Parameters:
+    - data: pandas DataFrame with an 'administration_date' column
+    - root: str, directory of the store
+    - overwrite: bool, delete the partitions being written before writing them
+    - basename: str, optional file name template containing '{i}', numbered
+      from 0 in every partition; a file of the same name is replaced, so
+      writing the same rows again with the same basename adds nothing
+    """
+    data = data.copy()
+    data['administration_date'] = pd.to_datetime(data['administration_date'])
+    data[MONTH_COLUMN] = data['administration_date'].dt.strftime('%Y-%m')
+
+    options = {'basename_template': basename} if basename else {}
+    data.to_parquet(root, engine='pyarrow', compression=COMPRESSION, index=False,
+                    partition_cols=PARTITION_COLUMNS,
+                    existing_data_behavior='delete_matching' if overwrite else 'overwrite_or_ignore', **options)
+    _write_version(root)
+
+
+def _month(value):
+    return pd.Timestamp(value).strftime('%Y-%m')
+
+
+def _month_directory(month):
+    return f'{MONTH_COLUMN}={month}'
+
+
+def _staging_root(root):
+    # Next to the store, on the same file system, so the rewritten month can be renamed in
+    return os.path.normpath(root) + '.compact'
+
+
+def partition_file_counts(root):
+    """
+    Return, for every month of a store, the largest number of files in one of its region partitions.
+
+    Parameters:
+    - root: str, directory of the store
+
+    Returns:
+    - counts: dict mapping 'YYYY-MM' to a number of files
+    """
+    counts = {}
+    for name in os.listdir(root):
+        month_path = os.path.join(root, name)
+        if not name.startswith(MONTH_COLUMN + '=') or not os.path.isdir(month_path):
+            continue
+        counts[name.split('=', 1)[1]] = max((sum(filename.endswith('.parquet') for filename in os.listdir(os.path.join(month_path, region)))
+                                             for region in os.listdir(month_path) if os.path.isdir(os.path.join(month_path, region))),
+                                            default=0)
+    return counts
+
+
+def finish_compaction(root):
+    """
+    Complete a compact_month interrupted after its month was written, and remove its leftovers.
+
+    The month is swapped in with two directory renames, so this only has to
+    redo the renames that did not happen yet.
+    """
+    state_path = os.path.join(root, COMPACT_FILE)
+    staging = _staging_root(root)
+
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            month = json.load(f)['month']
+        target = os.path.join(root, _month_directory(month))
+        staged = os.path.join(staging, _month_directory(month))
+        if os.path.exists(staged):
+            if os.path.exists(target):
+                os.rename(target, os.path.join(staging, 'replaced'))
+            os.rename(staged, target)
+        os.remove(state_path)
+
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def compact_month(root, month):
+    """
+    Rewrite the partitions of one month as one file per region.
+
+    Appending day by day leaves a small file per day in every partition of
+    the month, and every later read opens each of them. The month is written
+    next to the store first, then renamed in place of the old partitions, see
+    finish_compaction. The rows do not change, so neither does store_version,
+    and a cube saved for the store stays valid. Readers may miss the month
+    between the two renames, so compaction is meant to run with the ingestion.
+
+    Parameters:
+    - root: str, directory of the store
+    - month: str, 'YYYY-MM'
+    """
+    finish_compaction(root)
+
+    month_path = os.path.join(root, _month_directory(month))
+    data = ds.dataset(month_path, format='parquet', partitioning='hive').to_table().to_pandas()
+
+    staging = _staging_root(root)
+    data.to_parquet(os.path.join(staging, _month_directory(month)), engine='pyarrow', compression=COMPRESSION,
+                    index=False, partition_cols=['region_name'], basename_template='part-{i}.parquet')
+
+    # Recorded once the month is fully written, from here on the swap is always finished
+    state_path = os.path.join(root, COMPACT_FILE)
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump({'month': month}, f)
+    os.replace(state_path + '.tmp', state_path)
+
+    finish_compaction(root)
+
+
+def read_dataset(root=STORE_PATH, columns=None, regions=None, start=None, end=None, dtypes=None):
+    """
+    Read only the requested columns and partitions of a store.
+
+    Parameters:
+    - root: str, directory of the store
+    - columns: list of str, columns to read (all columns if None)
+    - regions: list of str, region names to read (all regions if None)
+    - start: date-like, first administration date to read (inclusive)
+    - end: date-like, last administration date to read (inclusive)
+    - dtypes: dict, column types to apply to the result
+
+    Returns:
+    - data: pandas DataFrame
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning='hive')
+
+    # Month and region filters prune whole directories before any file is opened
+    conditions = []
+    if regions is not None:
+        conditions.append(ds.field('region_name').isin(list(regions)))
+    if start is not None:
+        conditions.append(ds.field(MONTH_COLUMN) >= _month(start))
+        conditions.append(ds.field('administration_date') >= pd.Timestamp(start))
+    if end is not None:
+        conditions.append(ds.field(MONTH_COLUMN) <= _month(end))
+        conditions.append(ds.field('administration_date') <= pd.Timestamp(end))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != MONTH_COLUMN]
+
+    data = dataset.to_table(columns=list(columns), filter=expression).to_pandas()
+
+    if dtypes:
+        data = data.astype({name: dtype for name, dtype in dtypes.items() if name in data.columns})
+
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the merged vaccination CSV into a partitioned Parquet store.')
+    parser.add_argument('csv_path', nargs='?', default='ItvaccinationMergedMap.csv')
+    parser.add_argument('--store', default=STORE_PATH)
+    args = parser.parse_args()
+
+    # Imported here because data_loader itself depends on this module
+    from data_loader import read_dataset as read_csv_dataset
+
+    write_dataset(read_csv_dataset(args.csv_path), args.store, overwrite=True)
+    print(f"Wrote {len(store_files(args.store))} files to {args.store}")
+
+
+if __name__ == '__main__':
+    main()
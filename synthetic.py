@@ -0,0 +1,355 @@
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import DOSE_COLUMNS
+from regions import REGIONS_PATH, join_regional_attributes, load_regional_attributes
+from storage import write_dataset
+
+
+# Rows generated and written at a time, peak memory depends on this and not on the output size
+CHUNK_SIZE = 1_000_000
+
+# Default campaign period, rows are spread over it (or over its first days for small outputs)
+START_DATE = '2020-12-27'
+END_DATE = '2023-12-31'
+
+# Doses administered nationally on the busiest days of the 2021 campaign
+PEAK_DAILY_DOSES = 600_000
+
+# Regions of the upstream file: area code, ISTAT code, name, NUTS1 code and description, NUTS2 code.
+# The two autonomous provinces share the ISTAT code of Trentino Alto Adige.
+REGIONS = [
+    ('PIE', 1, 'Piemonte', 'ITC', 'Nord-Ovest', 'ITC1'),
+    ('VDA', 2, "Valle d'Aosta / Vallée d'Aoste", 'ITC', 'Nord-Ovest', 'ITC2'),
+    ('LOM', 3, 'Lombardia', 'ITC', 'Nord-Ovest', 'ITC4'),
+    ('PAB', 4, 'Provincia Autonoma Bolzano / Bozen', 'ITH', 'Nord-Est', 'ITH1'),
+    ('PAT', 4, 'Provincia Autonoma Trento', 'ITH', 'Nord-Est', 'ITH2'),
+    ('VEN', 5, 'Veneto', 'ITH', 'Nord-Est', 'ITH3'),
+    ('FVG', 6, 'Friuli-Venezia Giulia', 'ITH', 'Nord-Est', 'ITH4'),
+    ('LIG', 7, 'Liguria', 'ITC', 'Nord-Ovest', 'ITC3'),
+    ('EMR', 8, 'Emilia-Romagna', 'ITH', 'Nord-Est', 'ITH5'),
+    ('TOS', 9, 'Toscana', 'ITI', 'Centro', 'ITI1'),
+    ('UMB', 10, 'Umbria', 'ITI', 'Centro', 'ITI2'),
+    ('MAR', 11, 'Marche', 'ITI', 'Centro', 'ITI3'),
+    ('LAZ', 12, 'Lazio', 'ITI', 'Centro', 'ITI4'),
+    ('ABR', 13, 'Abruzzo', 'ITF', 'Sud', 'ITF1'),
+    ('MOL', 14, 'Molise', 'ITF', 'Sud', 'ITF2'),
+    ('CAM', 15, 'Campania', 'ITF', 'Sud', 'ITF3'),
+    ('PUG', 16, 'Puglia', 'ITF', 'Sud', 'ITF4'),
+    ('BAS', 17, 'Basilicata', 'ITF', 'Sud', 'ITF5'),
+    ('CAL', 18, 'Calabria', 'ITF', 'Sud', 'ITF6'),
+    ('SIC', 19, 'Sicilia', 'ITG', 'Isole', 'ITG1'),
+    ('SAR', 20, 'Sardegna', 'ITG', 'Isole', 'ITG2'),
+]
+
+# Share of the Trentino Alto Adige population living in each autonomous province
+PROVINCE_SHARES = {'PAB': 0.49, 'PAT': 0.51}
+
+# Age ranges with their share of the doses and the share of males among the vaccinated
+AGE_RANGES = ['05-11', '12-19', '20-29', '30-39', '40-49', '50-59', '60-69', '70-79', '80-89', '90+']
+AGE_SHARES = np.array([0.04, 0.08, 0.10, 0.11, 0.15, 0.16, 0.13, 0.12, 0.08, 0.03])
+MALE_SHARES = np.array([0.51, 0.51, 0.50, 0.50, 0.49, 0.49, 0.48, 0.46, 0.40, 0.30])
+
+# Suppliers with their weight while in use, the period they were used in and the ages they were given to
+SUPPLIERS = [
+    ('Pfizer/BioNTech', 0.68, '2020-12-27', None, AGE_RANGES[1:]),
+    ('Moderna', 0.17, '2021-01-14', None, AGE_RANGES[1:]),
+    ('Vaxzevria (AstraZeneca)', 0.12, '2021-02-01', '2021-10-31', AGE_RANGES[3:]),
+    ('Janssen', 0.03, '2021-04-15', '2021-12-31', AGE_RANGES[3:]),
+    ('Novavax', 0.01, '2022-02-28', None, AGE_RANGES[1:]),
+    ('Pfizer Pediatrico', 1.00, '2021-12-16', None, AGE_RANGES[:1]),
+]
+
+# Campaign waves of each dose type: peak date, width in days and height relative to PEAK_DAILY_DOSES
+WAVES = {
+    'first_dose': [('2021-06-10', 60, 0.55)],
+    'second_dose': [('2021-07-15', 60, 0.50)],
+    'previous_infection': [('2021-07-01', 90, 0.02)],
+    'additional_booster_dose': [('2021-12-25', 30, 0.90)],
+    'second_booster': [('2022-07-20', 50, 0.08)],
+    'db3': [('2022-11-10', 45, 0.06)],
+}
+
+# Autumn booster repeated every year after the initial campaign
+YEARLY_BOOSTER = ('10-20', 40, 0.05)
+
+# Relative number of doses from Monday to Sunday
+WEEKDAY_FACTORS = np.array([1.05, 1.08, 1.07, 1.06, 1.04, 0.85, 0.55])
+
+# Spread of the day-to-day noise of each region
+REGION_NOISE = 0.15
+
+UPSTREAM_COLUMNS = ['administration_date', 'supplier', 'region', 'age_range', 'males', 'females'] + DOSE_COLUMNS + \
+                   ['NUTS1_code', 'NUTS1_description', 'NUTS2_code', 'ISTAT_regional_code', 'region_name']
+MERGED_COLUMNS = UPSTREAM_COLUMNS + ['pop_resid', 'gdp_tot', 'dens_ab', 'dailytotal']
+
+
+def region_table(regions_path=REGIONS_PATH):
+    """
+    Return the regions of the upstream file with their share of the doses and their attributes.
+
+    The shares follow the resident population of ita_reg_ann_data.csv. The
+    attributes are joined like the notebook does, so regions whose names differ
+    in the two files get NaN.
+
+    Parameters:
+    - regions_path: str, path to ita_reg_ann_data.csv
+
+    Returns:
+    - regions: pandas DataFrame, one row per region in REGIONS order
+    """
+    regions = pd.DataFrame(REGIONS, columns=['region', 'ISTAT_regional_code', 'region_name', 'NUTS1_code', 'NUTS1_description', 'NUTS2_code'])
+    attributes = load_regional_attributes(regions_path)
+
+    population = regions['ISTAT_regional_code'].map(attributes.set_index('cod_reg')['pop_resid'])
+    population *= regions['region'].map(PROVINCE_SHARES).fillna(1.0)
+    regions['share'] = population / population.sum()
+
+    regions, _ = join_regional_attributes(regions, attributes)
+    return regions
+
+
+def daily_doses(dates):
+    """
+    Return the expected national number of doses of each type on each date.
+
+    Parameters:
+    - dates: pandas DatetimeIndex
+
+    Returns:
+    - doses: numpy array of shape (len(dates), len(DOSE_COLUMNS))
+    """
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    doses = np.zeros((len(dates), len(DOSE_COLUMNS)))
+
+    for column, waves in WAVES.items():
+        waves = list(waves)
+        if column == 'db3':
+            # One autumn wave per year after the waves above
+            month_day, width, height = YEARLY_BOOSTER
+            for year in range(2023, dates.max().year + 1):
+                waves.append((f'{year}-{month_day}', width, height))
+        for peak, width, height in waves:
+            peak = np.datetime64(peak, 'D').astype(np.int64)
+            doses[:, DOSE_COLUMNS.index(column)] += height * np.exp(-0.5 * ((days - peak) / width) ** 2)
+
+    return doses * PEAK_DAILY_DOSES * WEEKDAY_FACTORS[dates.dayofweek.to_numpy()][:, np.newaxis]
+
+
+def supplier_shares(dates):
+    """
+    Return the share of each supplier among the doses of each age range on each date.
+
+    Parameters:
+    - dates: pandas DatetimeIndex
+
+    Returns:
+    - shares: numpy array of shape (len(dates), len(SUPPLIERS), len(AGE_RANGES)),
+      zero for the ages nobody was vaccinated at on a date
+    """
+    weights = np.zeros((len(dates), len(SUPPLIERS), len(AGE_RANGES)))
+    for i, (_, weight, first, last, ages) in enumerate(SUPPLIERS):
+        in_use = (dates >= pd.Timestamp(first)) & (dates <= pd.Timestamp(last or dates.max()))
+        given_to = np.isin(AGE_RANGES, ages)
+        weights[:, i, :] = weight * np.outer(in_use, given_to)
+
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+
+def expected_doses(dates, regions):
+    """
+    Return the expected number of doses of every key, before the regional noise.
+
+    Parameters:
+    - dates: pandas DatetimeIndex
+    - regions: pandas DataFrame from region_table
+
+    Returns:
+    - expected: numpy array of shape (len(dates), len(SUPPLIERS), len(REGIONS), len(AGE_RANGES))
+    """
+    return (daily_doses(dates).sum(axis=1)[:, None, None, None]
+            * supplier_shares(dates)[:, :, None, :]
+            * regions['share'].to_numpy()[None, None, :, None]
+            * AGE_SHARES[None, None, None, :])
+
+
+def active_keys(expected):
+    """
+    Tell which keys have rows: like the real data, only the suppliers and age
+    ranges vaccinated on a date, in the regions expecting at least one dose.
+    """
+    return expected >= 1
+
+
+def plan(rows, regions, start=START_DATE, end=END_DATE):
+    """
+    Choose the dates and the number of rows per key needed for `rows` rows.
+
+    A key is one active (date, supplier, region, age_range) combination, see
+    active_keys. Small outputs cover the first days of the period with one row
+    per key. Outputs larger than one row per key over the whole period split
+    each key over several rows, like several vaccination sites reporting the same day.
+
+    Parameters:
+    - rows: int, number of rows
+    - regions: pandas DataFrame from region_table
+    - start, end: date-like, campaign period
+
+    Returns:
+    - dates: pandas DatetimeIndex
+    - rows_per_key: int
+    - rows_per_day: numpy array, number of rows of each date
+    """
+    period = pd.date_range(start, end, freq='D')
+    keys_per_day = active_keys(expected_doses(period, regions)).sum(axis=(1, 2, 3))
+
+    rows_per_key = max(1, math.ceil(rows / keys_per_day.sum()))
+    rows_per_day = keys_per_day * rows_per_key
+    days = int(np.searchsorted(np.cumsum(rows_per_day), rows)) + 1
+    return period[:days], rows_per_key, rows_per_day[:days]
+
+
+def _split(rng, counts, probabilities):
+    # Split counts among the columns of probabilities with one binomial draw per column
+    parts = np.empty(probabilities.shape, dtype=np.int64)
+    remaining = counts.copy()
+    left = np.ones(len(counts))
+    for j in range(probabilities.shape[1] - 1):
+        p = np.divide(probabilities[:, j], left, out=np.zeros(len(counts)), where=left > 0)
+        parts[:, j] = rng.binomial(remaining, np.clip(p, 0, 1))
+        remaining -= parts[:, j]
+        left -= probabilities[:, j]
+    parts[:, -1] = remaining
+    return parts
+
+
+def generate_chunk(rng, dates, regions, rows_per_key=1):
+    """
+    Generate the rows of a block of dates, sorted by date, supplier, region and age range.
+
+    Parameters:
+    - rng: numpy Generator
+    - dates: pandas DatetimeIndex
+    - regions: pandas DataFrame from region_table
+    - rows_per_key: int, rows per active (date, supplier, region, age_range), see active_keys
+
+    Returns:
+    - chunk: pandas DataFrame with the MERGED_COLUMNS columns
+    """
+    expected = expected_doses(dates, regions)
+    active = active_keys(expected)
+
+    # Position of every active key along each axis, in date, supplier, region, age_range order
+    date_idx, supplier_idx, region_idx, age_idx = np.nonzero(active)
+    noise = rng.lognormal(0.0, REGION_NOISE, size=(len(dates), len(REGIONS)))[date_idx, region_idx]
+    mean = expected[active] * noise / rows_per_key
+
+    # One row per key and reporting site
+    date_idx, supplier_idx, region_idx, age_idx, mean = (np.repeat(values, rows_per_key)
+                                                         for values in (date_idx, supplier_idx, region_idx, age_idx, mean))
+
+    # Every row reports at least one dose, the real data has no empty rows
+    total = 1 + rng.poisson(np.maximum(mean - 1, 0))
+
+    males = rng.binomial(total, MALE_SHARES[age_idx])
+    doses = daily_doses(dates)
+    dose_shares = doses / np.maximum(doses.sum(axis=1, keepdims=True), 1e-12)
+    dose_counts = _split(rng, total, dose_shares[date_idx])
+
+    chunk = {
+        'administration_date': dates[date_idx],
+        'supplier': pd.Categorical.from_codes(supplier_idx, [supplier[0] for supplier in SUPPLIERS]),
+        'region': pd.Categorical.from_codes(region_idx, regions['region']),
+        'age_range': pd.Categorical.from_codes(age_idx, AGE_RANGES),
+        'males': males,
+        'females': total - males,
+    }
+    for j, column in enumerate(DOSE_COLUMNS):
+        chunk[column] = dose_counts[:, j]
+    for column in ['NUTS1_code', 'NUTS1_description', 'NUTS2_code', 'region_name']:
+        chunk[column] = pd.Categorical(regions[column].to_numpy()[region_idx])
+    for column in ['ISTAT_regional_code', 'pop_resid', 'gdp_tot', 'dens_ab']:
+        chunk[column] = regions[column].to_numpy()[region_idx]
+    chunk['dailytotal'] = total
+
+    return pd.DataFrame(chunk)[MERGED_COLUMNS]
+
+
+def generate(rows, path, output_format='csv', schema='merged', start=START_DATE, end=END_DATE,
+             chunk_size=CHUNK_SIZE, seed=0, regions_path=REGIONS_PATH, verbose=False):
+    """
+    Write a synthetic dataset of exactly `rows` rows, one chunk of dates at a time.
+
+    Parameters:
+    - rows: int, number of rows
+    - path: str, CSV file or Parquet store directory to write
+    - output_format: str, 'csv' or 'parquet' (a store partitioned like storage.write_dataset)
+    - schema: str, 'upstream' for the columns of italian_vaccination.csv,
+      'merged' to also add pop_resid, gdp_tot, dens_ab and dailytotal
+    - start, end: date-like, campaign period
+    - chunk_size: int, approximate number of rows generated at a time
+    - seed: int, seed of the random generator
+    - regions_path: str, path to ita_reg_ann_data.csv
+    - verbose: bool, print the progress after each chunk
+
+    Returns:
+    - chunks: int, number of chunks written
+    """
+    if rows < 1:
+        raise ValueError(f"Cannot generate {rows} rows, at least one is needed")
+
+    rng = np.random.default_rng(seed)
+    regions = region_table(regions_path)
+    dates, rows_per_key, rows_per_day = plan(rows, regions, start, end)
+    columns = MERGED_COLUMNS if schema == 'merged' else UPSTREAM_COLUMNS
+
+    written, chunks, first = 0, 0, 0
+    while first < len(dates):
+        # At least one date per chunk, then as many as fit in chunk_size rows
+        last = first + max(1, int(np.searchsorted(np.cumsum(rows_per_day[first:]), chunk_size, side='right')))
+        chunk = generate_chunk(rng, dates[first:last], regions, rows_per_key)
+        chunk = chunk.iloc[:rows - written][columns]
+        first = last
+
+        if output_format == 'parquet':
+            write_dataset(chunk, path, overwrite=False)
+        else:
+            chunk.to_csv(path, mode='a' if chunks else 'w', header=not chunks, index=False)
+
+        written += len(chunk)
+        chunks += 1
+        if verbose:
+            print(f"{written:,} / {rows:,} rows, up to {chunk['administration_date'].iloc[-1].date()}")
+
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic vaccination dataset with the columns of the real one.')
+    parser.add_argument('rows', type=int, help='number of rows, e.g. 1000000')
+    parser.add_argument('path', help='CSV file, or store directory with --format parquet')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--schema', choices=['upstream', 'merged'], default='merged')
+    parser.add_argument('--start', default=START_DATE)
+    parser.add_argument('--end', default=END_DATE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--regions', default=REGIONS_PATH, help='path to ita_reg_ann_data.csv')
+    args = parser.parse_args()
+
+    if args.rows < 1:
+        parser.error("rows must be at least 1")
+    if args.format == 'parquet' and os.path.exists(args.path):
+        parser.error(f"{args.path} already exists, new files would be mixed with the existing ones")
+
+    generate(args.rows, args.path, args.format, args.schema, args.start, args.end,
+             args.chunk_size, args.seed, args.regions, verbose=True)
+
+
+if __name__ == '__main__':
+    main()
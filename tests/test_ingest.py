@@ -0,0 +1,61 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import _first_row_after  # noqa: E402
+
+
+HEADER = b'supplier,administration_date,males\n'
+
+# Several rows per date, like the upstream file
+ROWS = [b'Pfizer/BioNTech,2021-01-01,10\n', b'Moderna,2021-01-01,20\n',
+        b'Pfizer/BioNTech,2021-01-02,30\n',
+        b'Janssen,2021-01-03,40\n', b'Moderna,2021-01-03,50\n', b'Pfizer/BioNTech,2021-01-03,60\n',
+        b'Moderna,2021-01-04,70\n']
+
+
+def search(rows, last_date):
+    # Byte offset returned for the file HEADER + rows, and the rows from there
+    content = HEADER + b''.join(rows)
+    f = io.BytesIO(content)
+    offset = _first_row_after(f, len(HEADER), len(content), 1, pd.Timestamp(last_date))
+    return offset, content[offset:]
+
+
+def test_before_first_row_returns_first_line():
+    offset, tail = search(ROWS, '2020-12-31')
+    assert offset == len(HEADER)
+    assert tail == b''.join(ROWS)
+
+
+def test_new_rows_start_after_every_row_of_last_date():
+    offset, tail = search(ROWS, '2021-01-02')
+    assert tail == b''.join(ROWS[3:])
+
+
+def test_only_last_line_is_new():
+    offset, tail = search(ROWS, '2021-01-03')
+    assert tail == ROWS[-1]
+
+
+def test_only_last_line_is_new_without_final_newline():
+    rows = ROWS[:-1] + [ROWS[-1].rstrip(b'\n')]
+    offset, tail = search(rows, '2021-01-03')
+    assert tail == rows[-1]
+
+
+@pytest.mark.parametrize('last_date', ['2021-01-04', '2021-02-01'])
+def test_no_new_rows_returns_end_of_file(last_date):
+    offset, tail = search(ROWS, last_date)
+    assert offset == len(HEADER) + len(b''.join(ROWS))
+    assert tail == b''
+
+
+def test_single_row_file():
+    assert search(ROWS[:1], '2020-12-31')[1] == ROWS[0]
+    assert search(ROWS[:1], '2021-01-01')[1] == b''
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def make_windows(data, time_steps, horizon=1, stride=1, target_column=0):
+    """
+    Build the LSTM input windows and targets as strided views of the data, without copying it.
+
+    Window i covers rows [i * stride, i * stride + time_steps) and its target is
+    the next `horizon` values of target_column.
+
+    Parameters:
+    - data: numpy array of shape (n,) or (n, n_features)
+    - time_steps: int, length of each input window
+    - horizon: int, number of future values to predict
+    - stride: int, step between the starts of consecutive windows
+    - target_column: int, feature predicted by the model
+
+    Returns:
+    - X: read-only view of shape (n_windows, time_steps, n_features)
+    - y: read-only view of shape (n_windows,) if horizon is 1, else (n_windows, horizon)
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+
+    n_windows = len(data) - time_steps - horizon + 1
+    if n_windows <= 0:
+        raise ValueError(f"{len(data)} rows are not enough for windows of {time_steps} steps and a horizon of {horizon}")
+
+    # (n - time_steps + 1, n_features, time_steps) -> (n_windows, time_steps, n_features)
+    X = sliding_window_view(data, time_steps, axis=0).transpose(0, 2, 1)[:n_windows:stride]
+    y = sliding_window_view(data[time_steps:, target_column], horizon)[:n_windows:stride]
+
+    return X, (y[:, 0] if horizon == 1 else y)
+
+
+def steps_per_epoch(n_windows, batch_size):
+    """
+    Return the number of batches batch_generator yields per epoch.
+    """
+    return math.ceil(n_windows / batch_size)
+
+
+def batch_generator(X, y, batch_size=32, shuffle=False, seed=None):
+    """
+    Yield (X, y) batches forever, copying only one batch at a time.
+
+    Intended for model.fit(batch_generator(X, y, batch_size),
+    steps_per_epoch=steps_per_epoch(len(X), batch_size), epochs=...).
+
+    Parameters:
+    - X, y: arrays or views from make_windows
+    - batch_size: int, windows per batch
+    - shuffle: bool, visit the windows in a new random order every epoch
+    - seed: int, seed of the shuffling
+
+    Yields:
+    - X_batch, y_batch: contiguous numpy arrays
+    """
+    rng = np.random.default_rng(seed)
+    while True:
+        order = rng.permutation(len(X)) if shuffle else np.arange(len(X))
+        for start in range(0, len(X), batch_size):
+            rows = order[start:start + batch_size]
+            yield X[rows], y[rows]